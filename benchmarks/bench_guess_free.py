@@ -0,0 +1,31 @@
+""" Benchmark guess-free board generation, reporting the throughput per difficulty to size the feature for production.
+    Every board is generated for a first click in the middle of the board, with the same timeout that the game uses.
+
+    Run from the repository root with: `python benchmarks/bench_guess_free.py [boards per difficulty]`
+"""
+import sys
+from os.path import dirname, join
+from random import Random
+
+sys.path.insert(0, join(dirname(__file__), '..'))
+from minesweeper.minesweeper import DIFFICULTIES  # noqa: E402
+from minesweeper.solver.guess_free import STATS, generate_guess_free  # noqa: E402
+
+TIMEOUT = 5
+
+
+def main():
+    boards = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    rng = Random(0)
+    print('{:<14}{:>10}{:>16}{:>10}{:>10}'.format('difficulty', 'boards/s', 'attempts/board', 'failures', 'elapsed'))
+    for difficulty, (width, height, num_mines) in DIFFICULTIES.items():
+        for _ in range(boards):
+            generate_guess_free(width, height, num_mines, (width // 2, height // 2), rng, TIMEOUT)
+        stats = STATS[(width, height, num_mines)]
+        print('{:<14}{:>10.1f}{:>16.1f}{:>10}{:>9.2f}s'.format(difficulty, stats.boards_per_second,
+                                                                stats.attempts_per_board, stats.failures,
+                                                                stats.elapsed))
+
+
+if __name__ == '__main__':
+    main()
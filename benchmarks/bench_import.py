@@ -0,0 +1,55 @@
+""" Benchmark the startup latency of the headless entry points, each in a fresh interpreter, so regressions like an
+    eager import of Qt or of the GUI's resources are caught. The time of an empty interpreter is subtracted. Exits with
+    status 1 if a headless entry point loads Qt or the GUI, or if any of them takes longer than the budget.
+
+    Run from the repository root with: `python benchmarks/bench_import.py [budget in ms]`
+"""
+import subprocess
+import sys
+import time
+from os.path import abspath, dirname, join
+
+ROOT = abspath(join(dirname(__file__), '..'))
+# (name, code run with `python -c`, stdin)
+CASES = [
+    ('import minesweeper', 'import minesweeper', ''),
+    ('import engine + parser', 'import minesweeper.minesweeper, minesweeper.parser', ''),
+    ('--headless, one move', "import runpy, sys; sys.argv = ['minesweeper', '--headless', '--seed', '1']; "
+                             "runpy.run_module('minesweeper', run_name='__main__')", '4 4\nexit\n'),
+]
+# Reports the modules that mustn't be loaded by the headless entry points, appended to the code of every case.
+CHECK = ("; import sys; print('\\0' + ','.join(m for m in sys.modules if m.startswith(('PyQt', 'minesweeper.gui'))), "
+         "file=sys.stderr)")
+REPEAT = 10
+
+
+def best_time(code, stdin=''):
+    """ :returns: The best wall time of running the code in a fresh interpreter, in seconds, and its stderr. """
+    best, stderr = float('inf'), ''
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        process = subprocess.run([sys.executable, '-c', code], input=stdin, cwd=ROOT, stdout=subprocess.DEVNULL,
+                                 stderr=subprocess.PIPE, universal_newlines=True, check=True)
+        best = min(best, time.perf_counter() - start)
+        stderr = process.stderr
+    return best, stderr
+
+
+def main():
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else None
+    baseline, _ = best_time('pass')
+    print('empty interpreter: {:.1f} ms'.format(baseline * 1000))
+    print('{:<26}{:>12}{:>10}'.format('case', 'time (ms)', 'qt free'))
+    failed = False
+    for name, code, stdin in CASES:
+        elapsed, stderr = best_time(code + CHECK, stdin)
+        loaded = stderr.rpartition('\0')[2].strip()
+        elapsed = (elapsed - baseline) * 1000
+        print('{:<26}{:>12.1f}{:>10}'.format(name, elapsed, 'no: ' + loaded if loaded else 'yes'))
+        if loaded or budget is not None and elapsed > budget:
+            failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+""" Benchmark mine placement, comparing `place_mines` to the previous approach of listing every square, removing the
+    safe square and calling `random.sample`. The time to build the board's neighbor tables is shown as well, as the
+    first `select` on a board size that isn't cached by `Geometry.of` pays for it on top of the placement.
+
+    Run from the repository root with: `python benchmarks/bench_placement.py`
+"""
+import random
+import sys
+import timeit
+from os.path import dirname, join
+
+sys.path.insert(0, join(dirname(__file__), '..'))
+from minesweeper.geometry import Geometry  # noqa: E402
+from minesweeper.placement import place_mines  # noqa: E402
+
+
+def place_mines_by_listing(size, num_mines, safe):
+    """ The placement approach that `place_mines` replaced. """
+    mines = bytearray(size)
+    squares = list(range(size))
+    squares.remove(safe)
+    for i in random.sample(squares, num_mines):
+        mines[i] = 1
+    return mines
+
+
+# (name, width, height, num_mines)
+CASES = [
+    ('expert', 30, 16, 99),
+    ('2000x2000, 1% mines', 2000, 2000, 40000),
+    ('2000x2000, 20% mines', 2000, 2000, 800000),
+    ('2000x2000, 95% mines', 2000, 2000, 3800000),
+]
+
+
+def main():
+    print('{:<24} {:>14} {:>14} {:>8} {:>14}'.format('board', 'listing (ms)', 'floyd (ms)', 'speedup', 'tables (ms)'))
+    for name, width, height, num_mines in CASES:
+        size = width*height
+        safe = size // 2
+        number = max(1, 100000 // size)
+        old = min(timeit.repeat(lambda: place_mines_by_listing(size, num_mines, safe), number=number, repeat=3))
+        new = min(timeit.repeat(lambda: place_mines(size, num_mines, safe), number=number, repeat=3))
+        # A new geometry every time, as `Geometry.of` would return one with the tables already built.
+        tables = min(timeit.repeat(lambda: Geometry(width, height).indices, number=number, repeat=3))
+        print('{:<24} {:>14.3f} {:>14.3f} {:>7.1f}x {:>14.3f}'.format(name, old / number * 1000, new / number * 1000,
+                                                                      old / new, tables / number * 1000))
+
+
+if __name__ == '__main__':
+    main()
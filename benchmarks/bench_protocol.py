@@ -0,0 +1,75 @@
+""" Benchmark the binary wire protocol against JSON, on the results of real games: the size of the encoded results and
+    the time to encode and decode them. Every result is checked to survive the round trip.
+
+    Run from the repository root with: `python benchmarks/bench_protocol.py`
+"""
+import json
+import sys
+import timeit
+from os.path import dirname, join
+from random import Random
+
+sys.path.insert(0, join(dirname(__file__), '..'))
+from minesweeper.minesweeper import (Minesweeper, OpenedSquare, Result, decode_moves, decode_result,  # noqa: E402
+                                     encode_move, encode_result)
+
+# (name, width, height, num_mines, number of games)
+CASES = [
+    ('expert', 30, 16, 99, 100),
+    ('200x200, 2% mines', 200, 200, 800, 20),
+    ('1000x1000, 1% mines', 1000, 1000, 10000, 3),
+]
+
+
+def first_results(width, height, num_mines, count):
+    """ :returns: The `Result`s of the first select in `count` games, which have the largest cascades. """
+    game = Minesweeper(seed=1)
+    game.set_config('custom', width, height, num_mines)
+    rng = Random(1)
+    results = []
+    for _ in range(count):
+        game.reset()
+        results.append(game.select(rng.randrange(width), rng.randrange(height)))
+    return results
+
+
+def to_json(result):
+    return json.dumps({'done': result.done, 'opened': [list(square) for square in result.opened]}).encode()
+
+
+def from_json(data):
+    result = json.loads(data)
+    return Result(result['done'], [OpenedSquare(*square) for square in result['opened']])
+
+
+def check_round_trip(results, width):
+    for result in results:
+        decoded = decode_result(encode_result(result, width), width)
+        assert decoded.done == result.done
+        assert decoded.opened == sorted(result.opened, key=lambda square: (square.y, square.x))
+    moves = [('select', 0, 0), ('flag', 65535, 3), ('question', 17, 65535)]
+    assert decode_moves(b''.join(encode_move(*move) for move in moves)) == moves
+
+
+def main():
+    print('{:<22}{:>9}{:>11}{:>11}{:>13}{:>13}{:>13}{:>13}'.format(
+        'case', 'squares', 'json (B)', 'binary (B)', 'json enc', 'binary enc', 'json dec', 'binary dec'))
+    for name, width, height, num_mines, count in CASES:
+        results = first_results(width, height, num_mines, count)
+        check_round_trip(results, width)
+        squares = sum(len(result.opened) for result in results) / len(results)
+        json_encoded = [to_json(result) for result in results]
+        binary_encoded = [encode_result(result, width) for result in results]
+        times = []
+        for statement in (lambda: [to_json(result) for result in results],
+                          lambda: [encode_result(result, width) for result in results],
+                          lambda: [from_json(data) for data in json_encoded],
+                          lambda: [decode_result(data, width) for data in binary_encoded]):
+            times.append(min(timeit.repeat(statement, number=1, repeat=3)) / len(results))
+        print('{:<22}{:>9.0f}{:>11.0f}{:>11.0f}{:>10.1f} us{:>10.1f} us{:>10.1f} us{:>10.1f} us'.format(
+            name, squares, sum(map(len, json_encoded)) / len(results), sum(map(len, binary_encoded)) / len(results),
+            *(t * 1e6 for t in times)))
+
+
+if __name__ == '__main__':
+    main()
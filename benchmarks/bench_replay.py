@@ -0,0 +1,59 @@
+""" Benchmark replay playback: records games of random moves to a replay file and then verifies every replay in it,
+    reporting the number of replays verified per minute on a single core.
+
+    Run from the repository root with: `python benchmarks/bench_replay.py [games] [difficulty]`
+"""
+import os
+import sys
+import tempfile
+import time
+from os.path import dirname, join
+from random import Random
+
+sys.path.insert(0, join(dirname(__file__), '..'))
+from minesweeper.clock import VirtualClock  # noqa: E402
+from minesweeper.minesweeper import Minesweeper  # noqa: E402
+from minesweeper.replay import Recorder, iter_replays, verify  # noqa: E402
+from minesweeper.simulation import random_policy  # noqa: E402
+
+
+def record(path, num_games, difficulty):
+    """ Record games of random moves, with a random delay between moves. """
+    clock = VirtualClock()
+    game = Minesweeper(difficulty, seed=1, clock=clock)
+    rng = Random(1)
+    with Recorder(game, path):
+        for _ in range(num_games):
+            game.reset()
+            while not game.done:
+                game.select(*random_policy(game, rng))
+                clock.advance(rng.random() * 2)
+
+
+def main():
+    num_games = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    difficulty = sys.argv[2] if len(sys.argv) > 2 else 'expert'
+    directory = tempfile.mkdtemp()
+    path = join(directory, 'games.replay')
+    start = time.perf_counter()
+    record(path, num_games, difficulty)
+    recording = time.perf_counter() - start
+    print('recorded {} {} games in {:.2f}s, {:.0f} bytes per replay'.format(num_games, difficulty, recording,
+                                                                           os.path.getsize(path) / num_games))
+    game = Minesweeper(seed=0, clock=VirtualClock())
+    start = time.perf_counter()
+    verified = failed = 0
+    for replay in iter_replays(path):
+        if verify(replay, game):
+            verified += 1
+        else:
+            failed += 1
+    elapsed = time.perf_counter() - start
+    print('verified {} replays ({} mismatches) in {:.2f}s, {:.0f} replays/min'.format(
+        verified + failed, failed, elapsed, (verified + failed) / elapsed * 60))
+    os.remove(path)
+    os.rmdir(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+""" Benchmark `Minesweeper.save` and `Minesweeper.load` against pickle, on games in progress: the size of the saved game
+    and the time to save and load it. Pickle is given the same data the snapshot holds, once as the flat buffers the game
+    stores and once as the nested lists that the state used to be stored as. All formats are saved to and loaded from the
+    same file.
+
+    Run from the repository root with: `python benchmarks/bench_snapshot.py`
+"""
+import os
+import pickle
+import sys
+import tempfile
+import timeit
+from os.path import dirname, join
+from random import Random
+
+sys.path.insert(0, join(dirname(__file__), '..'))
+from minesweeper.clock import VirtualClock  # noqa: E402
+from minesweeper.minesweeper import Minesweeper  # noqa: E402
+
+# (name, width, height, num_mines)
+CASES = [
+    ('expert', 30, 16, 99),
+    ('1000x1000, 15% mines', 1000, 1000, 150000),
+    ('4000x4000, 15% mines', 4000, 4000, 2400000),
+]
+
+
+def game_in_progress(width, height, num_mines):
+    """ :returns: A game with some squares opened and flagged. """
+    game = Minesweeper(seed=1, clock=VirtualClock())
+    game.set_config('custom', width, height, num_mines)
+    rng = Random(1)
+    for _ in range(20):
+        if game.done:
+            game.reset()
+        game.select(rng.randrange(width), rng.randrange(height))
+        game.flag(rng.randrange(width), rng.randrange(height))
+    return game
+
+
+def flat_data(game):
+    return (game.width, game.height, game.num_mines, game.mines_left, game.opened_count, game.done, game.time(),
+            game.state.codes, bytes(game.mines.codes), bytes(game.numbers.codes))
+
+
+def nested_data(game):
+    return (game.width, game.height, game.num_mines, game.mines_left, game.opened_count, game.done, game.time(),
+            game.state.tolist(), game.mines.tolist(), game.numbers.tolist())
+
+
+def pickle_save(data, path):
+    with open(path, 'wb') as f:
+        pickle.dump(data, f, pickle.HIGHEST_PROTOCOL)
+
+
+def pickle_load(path):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def best(statement, number):
+    return min(timeit.repeat(statement, number=number, repeat=3)) / number
+
+
+def main():
+    print('{:<22}{:>16}{:>16}{:>12}{:>12}{:>12}'.format('case', 'format', 'size (B)', 'save (ms)', 'load (ms)',
+                                                        'check'))
+    directory = tempfile.mkdtemp()
+    path = join(directory, 'game.snapshot')
+    for name, width, height, num_mines in CASES:
+        game = game_in_progress(width, height, num_mines)
+        number = max(1, 10000 // (width*height))
+        # The snapshot, through a file so loading goes through mmap.
+        loaded = Minesweeper(clock=VirtualClock())
+        save = best(lambda: game.save(path), number)
+        load = best(lambda: loaded.load(path), number)
+        assert loaded.state == game.state and loaded.mines.codes == game.mines.codes and \
+            loaded.numbers.codes == game.numbers.codes and loaded.mines_left == game.mines_left and \
+            loaded.opened_count == game.opened_count and loaded.time() == game.time()
+        print('{:<22}{:>16}{:>16}{:>12.3f}{:>12.3f}{:>12}'.format(name, 'snapshot', os.path.getsize(path), save * 1000,
+                                                                  load * 1000, 'ok'))
+        for format_name, data in (('pickle (flat)', flat_data), ('pickle (nested)', nested_data)):
+            save = best(lambda: pickle_save(data(game), path), number)
+            load = best(lambda: pickle_load(path), number)
+            print('{:<22}{:>16}{:>16}{:>12.3f}{:>12.3f}'.format('', format_name, os.path.getsize(path), save * 1000,
+                                                                load * 1000))
+    os.remove(path)
+    os.rmdir(directory)
+
+
+if __name__ == '__main__':
+    main()
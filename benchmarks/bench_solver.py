@@ -0,0 +1,53 @@
+""" Benchmark the constraint solver in a bot loop on expert boards: after every `select`, the solver is updated with the
+    opened squares, and the bot opens a square the solver proved safe, or guesses when there is none. Only the time
+    spent in the solver is measured. Exits with a non-zero status if the 99th percentile exceeds a millisecond per move.
+
+    Run from the repository root with: `python benchmarks/bench_solver.py [num_games]`
+"""
+import random
+import sys
+import time
+from os.path import dirname, join
+
+sys.path.insert(0, join(dirname(__file__), '..'))
+from minesweeper import Minesweeper  # noqa: E402
+from minesweeper.board import CLOSED  # noqa: E402
+from minesweeper.solver import ConstraintSolver  # noqa: E402
+
+# The maximum time the solver may take per move, in seconds.
+BUDGET = 0.001
+
+
+def main(num_games=500):
+    game = Minesweeper('expert', seed=0)
+    solver = ConstraintSolver(game.width, game.height)
+    rng = random.Random(0)
+    timings = []
+    wins = 0
+    for _ in range(num_games):
+        game.reset()
+        solver.reset()
+        done, opened = game.select(game.width // 2, game.height // 2)
+        while not done:
+            start = time.perf_counter()
+            deductions = solver.update(game.state, opened)
+            timings.append(time.perf_counter() - start)
+            if deductions.safe:
+                x, y = deductions.safe[0]
+            else:
+                mines = set(deductions.mines)
+                codes = game.state.codes
+                x, y = rng.choice([(i % game.width, i // game.width) for i in range(len(codes))
+                                   if codes[i] == CLOSED and (i % game.width, i // game.width) not in mines])
+            done, opened = game.select(x, y)
+        wins += game.is_won()
+    timings.sort()
+    p99 = timings[int(len(timings) * 0.99)]
+    print('games: {}, won: {}, moves: {}'.format(num_games, wins, len(timings)))
+    print('solver time per move: mean {:.1f} us, median {:.1f} us, p99 {:.1f} us, max {:.1f} us'.format(
+        sum(timings) / len(timings) * 1e6, timings[len(timings) // 2] * 1e6, p99 * 1e6, timings[-1] * 1e6))
+    return 0 if p99 < BUDGET else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main(*map(int, sys.argv[1:])))
@@ -0,0 +1,88 @@
+""" Benchmark backing out of a move: `Minesweeper.rollback` to a checkpoint against restoring a deep copy of the game's
+    state, on large boards with a high mine density, so cascades stay small compared to the board. Only backing out is
+    timed, the move itself and taking the copy aren't. The cost of a rollback grows with the number of squares the move
+    changed, that of restoring a copy with the size of the board.
+
+    Run from the repository root with: `python benchmarks/bench_undo.py`
+"""
+import sys
+import time
+from copy import deepcopy
+from os.path import dirname, join
+
+sys.path.insert(0, join(dirname(__file__), '..'))
+from minesweeper.clock import VirtualClock  # noqa: E402
+from minesweeper.minesweeper import CLOSED, Minesweeper  # noqa: E402
+
+# (name, width, height, num_mines)
+CASES = [
+    ('expert', 30, 16, 99),
+    ('200x200, 20% mines', 200, 200, 8000),
+    ('1000x1000, 20% mines', 1000, 1000, 200000),
+    ('2000x2000, 20% mines', 2000, 2000, 800000),
+]
+# The number of moves that are backed out of per case.
+MOVES = 50
+
+
+def started_game(width, height, num_mines):
+    """ :returns: A game with its mines placed and some squares opened. """
+    game = Minesweeper(seed=1, clock=VirtualClock(), history=True)
+    game.set_config('custom', width, height, num_mines)
+    game.select(width // 2, height // 2)
+    return game
+
+
+def zeros(game, count):
+    """ :returns: The first `count` closed squares without mines around them, which open a cascade when selected. """
+    mines, numbers, state, width = game.mines.codes, game.numbers.codes, game.state.codes, game.width
+    squares = []
+    for i in range(len(state)):
+        if state[i] == CLOSED and not mines[i] and numbers[i] == 0:
+            squares.append((i % width, i // width))
+            if len(squares) == count:
+                break
+    return squares
+
+
+def restore_copy(game, x, y):
+    """ :returns: The number of squares that changed and the time it took to restore a copy of the game. """
+    saved = deepcopy((game._state, game._mines, game._numbers, game.mines_left, game.done, game._opened))
+    changed = len(game.select(x, y).opened)
+    start = time.perf_counter()
+    state, game._mines, game._numbers, game.mines_left, game.done, game._opened = deepcopy(saved)
+    # The state is restored in place, as `game.state` is a view on it.
+    game._state[:] = state
+    return changed, time.perf_counter() - start
+
+
+def rollback(game, x, y):
+    """ :returns: The number of squares that changed and the time it took to roll back to a checkpoint. """
+    checkpoint = game.checkpoint()
+    changed = len(game.select(x, y).opened)
+    start = time.perf_counter()
+    game.rollback(checkpoint)
+    return changed, time.perf_counter() - start
+
+
+def main():
+    print('{:<24}{:>10}{:>10}{:>16}{:>16}'.format('case', 'squares', 'changed', 'copy (us)', 'rollback (us)'))
+    for name, width, height, num_mines in CASES:
+        game = started_game(width, height, num_mines)
+        before = bytes(game.state.codes)
+        squares = zeros(game, MOVES)
+        times = []
+        for back_out in (restore_copy, rollback):
+            changed = elapsed = 0
+            for x, y in squares:
+                move_changed, move_elapsed = back_out(game, x, y)
+                changed += move_changed
+                elapsed += move_elapsed
+            assert bytes(game.state.codes) == before
+            times.append(elapsed / len(squares))
+        print('{:<24}{:>10}{:>10.0f}{:>16.1f}{:>16.1f}'.format(name, width*height, changed / len(squares),
+                                                               *(t * 1e6 for t in times)))
+
+
+if __name__ == '__main__':
+    main()
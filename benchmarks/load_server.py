@@ -0,0 +1,80 @@
+""" Load test the game server on localhost. Every client connection plays its own session with random moves, one
+    request at a time, and the requests per second and latency percentiles are reported over all clients.
+
+    By default the server runs in the same process on a free port, pass `--port` to test a server that's already
+    running, e.g. one started with `python -m minesweeper serve`.
+
+    Run from the repository root with: `python benchmarks/load_server.py [--clients 100] [--seconds 10] [--port PORT]`
+"""
+import asyncio
+import json
+import random
+import sys
+import time
+from argparse import ArgumentParser
+from os.path import dirname, join
+
+sys.path.insert(0, join(dirname(__file__), '..'))
+from minesweeper.server import GameServer  # noqa: E402
+
+
+async def request(reader, writer, message):
+    writer.write(json.dumps(message).encode() + b'\n')
+    return json.loads(await reader.readline())
+
+
+async def client(host, port, end, latencies, rng):
+    """ Play random moves in a new session until `end`, appending the latency of every request to `latencies`. """
+    reader, writer = await asyncio.open_connection(host, port)
+    session = (await request(reader, writer, {'cmd': 'new'}))['session']
+    while time.perf_counter() < end:
+        closed = None
+        done = False
+        while not done and time.perf_counter() < end:
+            if closed is None:
+                state = await request(reader, writer, {'cmd': 'state', 'session': session})
+                closed = {(x, y) for y, row in enumerate(state['state']) for x, value in enumerate(row)
+                          if value is None}
+            x, y = rng.choice(tuple(closed))
+            start = time.perf_counter()
+            response = await request(reader, writer, {'cmd': 'select', 'session': session, 'x': x, 'y': y})
+            latencies.append(time.perf_counter() - start)
+            done = response['done']
+            closed.difference_update((square[0], square[1]) for square in response['opened'])
+        await request(reader, writer, {'cmd': 'reset', 'session': session})
+    await request(reader, writer, {'cmd': 'close', 'session': session})
+    writer.close()
+
+
+async def run(args):
+    server = None
+    port = args.port
+    if port is None:
+        server = await asyncio.start_server(GameServer(seed=1).handle, args.host, 0)
+        port = server.sockets[0].getsockname()[1]
+    latencies = []
+    start = time.perf_counter()
+    end = start + args.seconds
+    await asyncio.gather(*(client(args.host, port, end, latencies, random.Random(i)) for i in range(args.clients)))
+    elapsed = time.perf_counter() - start
+    if server is not None:
+        server.close()
+        await server.wait_closed()
+    latencies.sort()
+    print('clients: {}, requests: {}, {:.0f} requests/s'.format(args.clients, len(latencies),
+                                                               len(latencies) / elapsed))
+    for name, q in (('p50', 0.5), ('p90', 0.9), ('p99', 0.99)):
+        print('{} latency: {:.3f} ms'.format(name, latencies[min(int(len(latencies) * q), len(latencies) - 1)] * 1000))
+
+
+def main():
+    parser = ArgumentParser(description='Load test the game server.')
+    parser.add_argument('--clients', type=int, default=100)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
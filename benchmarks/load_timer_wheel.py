@@ -0,0 +1,64 @@
+""" Load test the game timer with thousands of concurrent games in one process, each with a timer listener. Reports the
+    number of threads and the tick jitter, i.e. how late each listener call is compared to the whole second it's meant
+    for. Compares the process-wide `SharedClock` to the `ThreadingClock`, which starts a thread per game per tick.
+
+    Run from the repository root with: `python benchmarks/load_timer_wheel.py [games] [seconds] [--threading]`
+"""
+import sys
+import threading
+import time
+from os.path import dirname, join
+
+sys.path.insert(0, join(dirname(__file__), '..'))
+from minesweeper.clock import SharedClock, ThreadingClock  # noqa: E402
+from minesweeper.minesweeper import Minesweeper  # noqa: E402
+
+
+def run(clock, num_games, seconds):
+    """ Start `num_games` games on the clock and let them tick for `seconds` seconds.
+        :returns: A (peak thread count, sorted jitters in seconds) tuple.
+    """
+    jitters = []
+    games = []
+    for _ in range(num_games):
+        game = Minesweeper('beginner', clock=clock)
+
+        def tick(game=game):
+            elapsed = clock.now() - game._start_time
+            jitters.append(elapsed - round(elapsed))
+        game.add_listener(tick)
+        # Start the timer, by opening a square.
+        game.select(0, 0)
+        games.append(game)
+    peak = threading.active_count()
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        time.sleep(0.05)
+        peak = max(peak, threading.active_count())
+    for game in games:
+        game._stop_timer()
+    return peak, sorted(jitters)
+
+
+def main():
+    positional = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    num_games = int(positional[0]) if positional else 10000
+    seconds = float(positional[1]) if len(positional) > 1 else 5
+    clocks = [('shared', SharedClock())]
+    if '--threading' in sys.argv:
+        clocks.append(('threading', ThreadingClock()))
+    print('{} games for {}s'.format(num_games, seconds))
+    print('{:<12}{:>10}{:>10}{:>12}{:>12}{:>12}'.format('clock', 'threads', 'ticks', 'p50 (ms)', 'p99 (ms)',
+                                                        'max (ms)'))
+    for name, clock in clocks:
+        peak, jitters = run(clock, num_games, seconds)
+        if not jitters:
+            print('{:<12}{:>10}{:>10}'.format(name, peak, 0))
+            continue
+        print('{:<12}{:>10}{:>10}{:>12.2f}{:>12.2f}{:>12.2f}'.format(
+            name, peak, len(jitters), jitters[len(jitters) // 2] * 1000, jitters[int(len(jitters) * 0.99)] * 1000,
+            jitters[-1] * 1000))
+
+
+if __name__ == '__main__':
+    main()
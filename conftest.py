@@ -0,0 +1,3 @@
+""" Makes pytest put the repository root on `sys.path`, so the tests import the `minesweeper` package from the checkout
+    without it being installed.
+"""
@@ -1,8 +1,28 @@
-""" Play minesweeper using the QT interface. """
-from .gui import MinesweeperGUI
+""" Play minesweeper using the QT interface, or run one of the headless commands. The GUI is only imported when it's
+    needed, so the headless commands never load Qt.
+"""
+import sys
+
 from .parser import parse_args
 
 
 args = parse_args()
-gui = MinesweeperGUI(**vars(args))
-gui.exec()
+command = args.command
+del args.command
+if command == 'simulate':
+    from .simulation import main
+    main(args)
+elif command == 'serve':
+    from .server import main
+    main(args)
+elif command == 'verify-replays':
+    from .verification import main
+    sys.exit(main(args))
+elif args.headless:
+    from .cli import main
+    main(args)
+else:
+    del args.headless
+    from .gui import MinesweeperGUI
+    gui = MinesweeperGUI(**vars(args))
+    gui.exec()
@@ -0,0 +1,277 @@
+""" A vectorized minesweeper engine that plays many games of the same size in lockstep, for simulations where the
+    per-object overhead of `Minesweeper` is the bottleneck. All boards are stored as 3D NumPy arrays, indexed as
+    `[game, y, x]`, using the state codes from `board`. The rules are exactly those of `Minesweeper.select`, `flag` and
+    `question`, including `first_never_mine`, the order in which a chord opens its neighbors and the flags placed on a
+    win. Batched games don't have a timer.
+
+    This module requires NumPy.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from .board import CLOSED, QUESTION, FLAG, MINE, MINE_HIT, FLAG_WRONG
+from .generator import NEIGHBOR_OFFSETS, default_rng, generate_boards
+from .minesweeper import board_size
+from .seeding import SeedSequence
+
+
+class BatchMinesweeper:
+    """ N minesweeper games of the same size, played in lockstep.
+
+        Attributes:
+        _rng              The `numpy.random.Generator` that the mine layouts are drawn from.
+        count             The number of games.
+        difficulty        The difficulty setting shared by all games.
+        done              A boolean array of shape (N,) with whether each game has ended.
+        first_never_mine  Whether the first click can hit a mine.
+        height            The number of squares along the height.
+        mines             A boolean array of shape (N, height, width) with the ground truth of the mines. Only valid
+                          for games where `placed` is set.
+        mines_left        An integer array of shape (N,) with the number of mines left unmarked in each game.
+        num_mines         The number of mines in each game.
+        numbers           A uint8 array of shape (N, height, width) with the number of neighboring mines of each
+                          square. Only valid for games where `placed` is set.
+        opened_count      An integer array of shape (N,) with the number of safe squares opened in each game.
+        placed            A boolean array of shape (N,) with whether the mines of each game have been placed yet.
+        seed              The seed of `_rng`.
+        state             A uint8 array of shape (N, height, width) with the state code of every square.
+        width             The number of squares along the width.
+    """
+    def __init__(self, count, difficulty='intermediate', width=None, height=None, num_mines=None,
+                 first_never_mine=True, seed=None):
+        """ :param count: The number of games to play in lockstep.
+            :param seed: The seed for the mine layouts as an integer or a `SeedSequence`, None for a random seed.
+            The other parameters are the same as those of `Minesweeper.set_config`.
+        """
+        self.count = count
+        self.difficulty = difficulty
+        self.width, self.height, self.num_mines = board_size(difficulty, width, height, num_mines)
+        self.first_never_mine = first_never_mine
+        if seed is None:
+            seed = SeedSequence()
+        if isinstance(seed, SeedSequence):
+            seed = seed.generate_seed()
+        self.seed = seed
+        self._rng = default_rng(seed)
+        shape = (count, self.height, self.width)
+        self.state = np.empty(shape, np.uint8)
+        self.mines = np.zeros(shape, bool)
+        self.numbers = np.zeros(shape, np.uint8)
+        self.placed = np.zeros(count, bool)
+        self.done = np.zeros(count, bool)
+        self.mines_left = np.zeros(count, np.int64)
+        self.opened_count = np.zeros(count, np.int64)
+        self.reset()
+
+    def reset(self, games=None):
+        """ Start new games.
+            :param games: A boolean mask or index array of the games to reset, None to reset all of them.
+        """
+        if games is None:
+            games = slice(None)
+        self.state[games] = CLOSED
+        self.placed[games] = False
+        self.done[games] = False
+        self.mines_left[games] = self.num_mines
+        self.opened_count[games] = 0
+
+    def is_won(self):
+        """ :returns: A boolean array of shape (N,) with whether each game has been won. """
+        return self.opened_count == self.width*self.height - self.num_mines
+
+    def _setup_mines(self, games, safe):
+        """ Place the mines for the given games at once, see `generate_boards`.
+            :param games: An index array of the games to place mines for.
+            :param safe: An integer array of shape (len(games), 2) with the (x, y) safe square of each game, None for no
+                         safe squares.
+        """
+        boards = generate_boards(len(games), self.width, self.height, self.num_mines, safe, self._rng)
+        self.mines[games] = boards.mines.view(bool)
+        self.numbers[games] = boards.numbers
+        self.placed[games] = True
+
+    def select(self, moves, active=None):
+        """ Select a square in every game, with the same rules as `Minesweeper.select`.
+            :param moves: An integer array of shape (N, 2) with the (x, y) square to select in each game.
+            :param active: A boolean mask of the games to make a move in, None to make a move in all games.
+            :returns done: A boolean array of shape (N,) with whether each game has ended.
+            :returns opened: A boolean array of shape (N, height, width) marking the squares that each move changed,
+                             i.e. the squares `Minesweeper.select` would return as opened.
+            :raises IndexError: If any of the squares isn't on the board.
+        """
+        moves = np.asarray(moves, np.intp)
+        xs, ys = self._split_moves(moves)
+        games = np.arange(self.count) if active is None else np.flatnonzero(active)
+        opened = np.zeros(self.state.shape, bool)
+        # Mines are only determined once a square is opened, to make to `first_never_mine` option possible.
+        unplaced = games[~self.placed[games]]
+        if len(unplaced):
+            safe = moves[unplaced] if self.first_never_mine else None
+            self._setup_mines(unplaced, safe)
+        # If the game ended, nothing happens.
+        games = games[~self.done[games]]
+        xs, ys = xs[games], ys[games]
+        codes = self.state[games, ys, xs]
+        is_mine = self.mines[games, ys, xs]
+        # The normal case, selecting an unflagged closed square, which is either a mine or a safe square to open.
+        closed = (codes == CLOSED) | (codes == QUESTION)
+        hit = closed & is_mine
+        dig = closed & ~is_mine
+        # Chords, where a number is selected that has as many flags around it as its number. Closed neighbors are
+        # opened in order, up to the first one with a mine under it.
+        neighbors = self._neighbor_squares(games, xs, ys)
+        chord = (codes <= 8) & ((neighbors[0] & (neighbors[2] == FLAG)).sum(axis=1) == codes)
+        closed_neighbors = neighbors[0] & (neighbors[2] == CLOSED) & chord[:, None]
+        mine_neighbors = closed_neighbors & neighbors[1]
+        has_mine = mine_neighbors.any(axis=1)
+        first_mine = np.where(has_mine, mine_neighbors.argmax(axis=1), len(NEIGHBOR_OFFSETS))
+        open_neighbors = closed_neighbors & ~neighbors[1] & (np.arange(len(NEIGHBOR_OFFSETS)) < first_mine[:, None])
+        # Open the safe squares and flood fill from them.
+        seeds = np.zeros((len(games), self.height, self.width), bool)
+        seeds[np.flatnonzero(dig), ys[dig], xs[dig]] = True
+        rows, ks = np.nonzero(open_neighbors)
+        seeds[rows, ys[rows] + np.take(_DY, ks), xs[rows] + np.take(_DX, ks)] = True
+        self._flood_fill(games, seeds, opened)
+        # Check whether any of the games were won, once per move. A chord that runs into a mine only loses if the
+        # neighbors before the mine didn't already win the game.
+        won = self.is_won()[games] & ~hit
+        chord_hit = chord & has_mine & ~won
+        for mask, hit_xs, hit_ys in ((hit, xs, ys),
+                                     (chord_hit, xs + np.take(_DX, first_mine.clip(max=7)),
+                                      ys + np.take(_DY, first_mine.clip(max=7)))):
+            self._lose(games[mask], hit_xs[mask], hit_ys[mask], opened)
+        self._win(games[won], opened)
+        return BatchResult(self.done.copy(), opened)
+
+    def flag(self, moves, active=None):
+        """ Toggle a flag in every game, with the same rules as `Minesweeper.flag`.
+            :returns: A boolean array of shape (N,) with whether a flag was placed or removed in each game.
+            :raises IndexError: If any of the squares isn't on the board.
+        """
+        xs, ys = self._split_moves(moves)
+        changed = ~self.done if active is None else ~self.done & active
+        codes = self.state[np.arange(self.count), ys, xs]
+        place = changed & ((codes == CLOSED) | (codes == QUESTION))
+        remove = changed & (codes == FLAG)
+        self.state[place, ys[place], xs[place]] = FLAG
+        self.state[remove, ys[remove], xs[remove]] = CLOSED
+        self.mines_left -= place
+        self.mines_left += remove
+        return place | remove
+
+    def question(self, moves, active=None):
+        """ Toggle a question mark in every game, with the same rules as `Minesweeper.question`.
+            :returns: A boolean array of shape (N,) with whether a question mark was placed or removed in each game.
+            :raises IndexError: If any of the squares isn't on the board.
+        """
+        xs, ys = self._split_moves(moves)
+        changed = ~self.done if active is None else ~self.done & active
+        codes = self.state[np.arange(self.count), ys, xs]
+        place = changed & ((codes == CLOSED) | (codes == FLAG))
+        remove = changed & (codes == QUESTION)
+        self.mines_left += place & (codes == FLAG)
+        self.state[place, ys[place], xs[place]] = QUESTION
+        self.state[remove, ys[remove], xs[remove]] = CLOSED
+        return place | remove
+
+    def _split_moves(self, moves):
+        """ :returns: The x and y coordinates of the moves as two integer arrays.
+            :raises IndexError: If any of the squares isn't on the board, like `Minesweeper` does, as NumPy would
+                                otherwise wrap negative coordinates around to the other side of the board.
+        """
+        moves = np.asarray(moves, np.intp)
+        if moves.shape != (self.count, 2):
+            raise ValueError('Expected moves of shape ({}, 2), got {}.'.format(self.count, moves.shape))
+        xs, ys = moves[:, 0], moves[:, 1]
+        outside = (xs < 0) | (xs >= self.width) | (ys < 0) | (ys >= self.height)
+        if outside.any():
+            k = outside.argmax()
+            raise IndexError('The square ({}, {}) of game {} is not on the {}x{} board.'.format(
+                xs[k], ys[k], k, self.width, self.height))
+        return xs, ys
+
+    def _neighbor_squares(self, games, xs, ys):
+        """ Gather the neighbors of one square per game.
+            :returns: Three arrays of shape (len(games), 8) with whether each neighbor is on the board, whether it has a
+                      mine under it and its state code, in the order of `NEIGHBOR_OFFSETS`.
+        """
+        nxs = xs[:, None] + _DX
+        nys = ys[:, None] + _DY
+        valid = (nxs >= 0) & (nxs < self.width) & (nys >= 0) & (nys < self.height)
+        nxs = nxs.clip(0, self.width - 1)
+        nys = nys.clip(0, self.height - 1)
+        rows = games[:, None]
+        return valid, valid & self.mines[rows, nys, nxs], self.state[rows, nys, nxs]
+
+    def _flood_fill(self, games, seeds, opened):
+        """ Open the seed squares and flood fill from the zeros among them, one ring of neighbors per iteration for all
+            games at once. Like `Minesweeper._iter_flood_fill`, squares with a flag or question mark are not opened by
+            the flood fill.
+            :param seeds: A boolean array of shape (len(games), height, width) with the safe squares to open.
+            :param opened: The (N, height, width) mask to mark the opened squares in.
+        """
+        games = games[seeds.any(axis=(1, 2))]
+        seeds = seeds[seeds.any(axis=(1, 2))]
+        while len(games):
+            state = self.state[games]
+            numbers = self.numbers[games]
+            state[seeds] = numbers[seeds]
+            self.state[games] = state
+            opened[games] |= seeds
+            self.opened_count[games] += seeds.sum(axis=(1, 2))
+            # Only games where a zero was opened keep going.
+            frontier = seeds & (numbers == 0)
+            keep = frontier.any(axis=(1, 2))
+            games, frontier, state = games[keep], frontier[keep], state[keep]
+            seeds = _dilate(frontier) & (state == CLOSED)
+            keep = seeds.any(axis=(1, 2))
+            games, seeds = games[keep], seeds[keep]
+
+    def _lose(self, games, xs, ys, opened):
+        """ End the given games after a mine was hit at (xs, ys), revealing all mines and wrongly placed flags. """
+        if not len(games):
+            return
+        self.state[games, ys, xs] = MINE_HIT
+        state, mines = self.state[games], self.mines[games]
+        reveal = mines & ((state == CLOSED) | (state == QUESTION))
+        wrong = ~mines & (state == FLAG)
+        state[reveal] = MINE
+        state[wrong] = FLAG_WRONG
+        self.state[games] = state
+        changed = reveal | wrong
+        changed[np.arange(len(games)), ys, xs] = True
+        opened[games] |= changed
+        self.done[games] = True
+
+    def _win(self, games, opened):
+        """ End the given games after they were won, placing flags on all mines that haven't been flagged yet. """
+        if not len(games):
+            return
+        state, mines = self.state[games], self.mines[games]
+        flagged = mines & (state != FLAG)
+        state[flagged] = FLAG
+        self.state[games] = state
+        opened[games] |= flagged
+        self.mines_left[games] = 0
+        self.done[games] = True
+
+
+# A tuple to store the results of a batched dig action in.
+# :param done: A boolean array with whether each game has ended.
+# :param opened: A boolean mask of the squares that each move changed.
+BatchResult = namedtuple('BatchResult', 'done, opened')
+
+# The offsets of `NEIGHBOR_OFFSETS` as separate arrays.
+_DX = np.array([dx for dx, _ in NEIGHBOR_OFFSETS])
+_DY = np.array([dy for _, dy in NEIGHBOR_OFFSETS])
+
+
+def _dilate(mask):
+    """ :returns: A mask of all squares neighboring a square in the given (K, height, width) mask. """
+    padded = np.pad(mask, ((0, 0), (1, 1), (1, 1)))
+    height, width = mask.shape[1:]
+    dilated = np.zeros(mask.shape, bool)
+    for dx, dy in NEIGHBOR_OFFSETS:
+        dilated |= padded[:, 1 + dy:1 + dy + height, 1 + dx:1 + dx + width]
+    return dilated
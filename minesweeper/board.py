@@ -0,0 +1,155 @@
+""" Compact board storage for the minesweeper game. Boards are kept as flat, row-major `bytearray`s, where the square at
+    (x, y) is stored at index `y*width + x`. Square states are stored as small integer codes, which are translated back
+    to the values documented on `Minesweeper.state` by `GridView`, so `game.state[y][x]` keeps working.
+"""
+
+# The state codes of a square. Opened squares store their number (0-8) as the code itself.
+CLOSED = 9
+QUESTION = 10
+FLAG = 11
+MINE = 12
+MINE_HIT = 13
+FLAG_WRONG = 14
+
+# The value that each state code represents in `Minesweeper.state`, indexed by code.
+DECODE = (0, 1, 2, 3, 4, 5, 6, 7, 8, None, '?', 'flag', 'mine', 'mine_hit', 'flag_wrong')
+# The state code for each value of `Minesweeper.state`.
+ENCODE = {value: code for code, value in enumerate(DECODE)}
+
+# Translation tables to move bits around in bulk with `bytes.translate`.
+_HIGH_NIBBLE = bytes((b << 4) & 0xff for b in range(256))
+_LOW_NIBBLE = bytes(b & 0xf for b in range(256))
+_TO_LOW_NIBBLE = bytes(b >> 4 for b in range(256))
+_TO_BIT = [bytes((b & 1) << k for b in range(256)) for k in range(8)]
+_FROM_BIT = [bytes((b >> k) & 1 for b in range(256)) for k in range(8)]
+
+
+def pack_nibbles(codes):
+    """ Pack codes of up to 4 bits two per byte, with the low nibble first.
+        :param codes: A bytes-like object of codes.
+        :returns: The packed codes as `bytes`, of length `ceil(len(codes) / 2)`.
+    """
+    codes = bytes(codes)
+    if len(codes) & 1:
+        codes += b'\0'
+    # Both halves are combined as big integers, which ORs all bytes at once.
+    packed = int.from_bytes(codes[0::2], 'little') | int.from_bytes(codes[1::2].translate(_HIGH_NIBBLE), 'little')
+    return packed.to_bytes(len(codes) >> 1, 'little')
+
+
+def unpack_nibbles(packed, size):
+    """ Unpack codes that were packed with `pack_nibbles`.
+        :param packed: The packed codes as `bytes`.
+        :param size: The number of codes.
+        :returns: The codes as a `bytearray`.
+    """
+    codes = bytearray(2*len(packed))
+    codes[0::2] = packed.translate(_LOW_NIBBLE)
+    codes[1::2] = packed.translate(_TO_LOW_NIBBLE)
+    del codes[size:]
+    return codes
+
+
+def pack_bits(flags):
+    """ Pack flags of 0 or 1 eight per byte, with the first flag in the lowest bit.
+        :param flags: A bytes-like object of flags.
+        :returns: The packed flags as `bytes`, of length `ceil(len(flags) / 8)`.
+    """
+    flags = bytes(flags)
+    flags += bytes(-len(flags) % 8)
+    packed = 0
+    for k in range(8):
+        packed |= int.from_bytes(flags[k::8].translate(_TO_BIT[k]), 'little')
+    return packed.to_bytes(len(flags) >> 3, 'little')
+
+
+def unpack_bits(packed, size):
+    """ Unpack flags that were packed with `pack_bits`.
+        :param packed: The packed flags as `bytes`.
+        :param size: The number of flags.
+        :returns: The flags as a `bytearray`.
+    """
+    flags = bytearray(8*len(packed))
+    for k in range(8):
+        flags[k::8] = packed.translate(_FROM_BIT[k])
+    del flags[size:]
+    return flags
+
+
+class GridView:
+    """ A read-only view on a flat board buffer that can be indexed like the 2D nested lists the game used to store,
+        i.e. `view[y][x]`. Rows are created on access, no copy of the board is ever made.
+
+        Attributes:
+        codes   The flat, row-major buffer that is being viewed.
+        decode  A sequence to translate the stored codes to values with, None to return the codes as they are.
+        height  The number of rows.
+        width   The number of squares in a row.
+    """
+    __slots__ = ('codes', 'decode', 'height', 'width')
+
+    def __init__(self, codes, width, height, decode=None):
+        self.codes = codes
+        self.decode = decode
+        self.height = height
+        self.width = width
+
+    def __getitem__(self, y):
+        if y < 0:
+            y += self.height
+        if not 0 <= y < self.height:
+            raise IndexError('Row index out of range.')
+        return _RowView(self, y*self.width)
+
+    def __len__(self):
+        return self.height
+
+    def __iter__(self):
+        for y in range(self.height):
+            yield _RowView(self, y*self.width)
+
+    def __eq__(self, other):
+        if isinstance(other, GridView):
+            other = other.tolist()
+        return self.tolist() == other
+
+    def __repr__(self):
+        return repr(self.tolist())
+
+    def tolist(self):
+        """ :returns: A copy of the viewed board as a 2D nested list, indexed as `[y][x]`. """
+        return [list(row) for row in self]
+
+
+class _RowView:
+    """ A single row of a `GridView`. """
+    __slots__ = ('_grid', '_offset')
+
+    def __init__(self, grid, offset):
+        self._grid = grid
+        self._offset = offset
+
+    def __getitem__(self, x):
+        grid = self._grid
+        if x < 0:
+            x += grid.width
+        if not 0 <= x < grid.width:
+            raise IndexError('Column index out of range.')
+        code = grid.codes[self._offset + x]
+        return code if grid.decode is None else grid.decode[code]
+
+    def __len__(self):
+        return self._grid.width
+
+    def __iter__(self):
+        grid = self._grid
+        codes = grid.codes[self._offset:self._offset + grid.width]
+        if grid.decode is None:
+            return iter(codes)
+        return (grid.decode[code] for code in codes)
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return repr(list(self))
@@ -0,0 +1,86 @@
+""" A headless, text based interface to play minesweeper in a terminal, or to script games through stdin. It only imports
+    the game engine, so it starts without loading Qt or the GUI's resources.
+
+    The board is printed after every command, with the column numbers above it and the row numbers next to it. Commands
+    are read one per line:
+    - `s x y` or `x y`: Select a square.
+    - `f x y`: Toggle a flag.
+    - `q x y`: Toggle a question mark.
+    - `u`, `r`: Undo or redo a move.
+    - `n`: Start a new game.
+    - `exit`: Stop playing, as does the end of the input.
+"""
+import sys
+
+from .board import DECODE
+from .minesweeper import Minesweeper
+
+# The character that every state code is printed as, indexed by code: the numbers, with a blank for zero, then closed
+# squares, question marks, flags, mines, the mine that was hit and wrongly placed flags.
+SYMBOLS = b' 12345678.?F*X#'
+# Translates a row of state codes to the characters they're printed as, in one go.
+_TABLE = bytes.maketrans(bytes(range(len(DECODE))), SYMBOLS)
+HELP = 's x y: select, f x y: flag, q x y: question mark, u: undo, r: redo, n: new game, exit: quit'
+
+
+def render(game):
+    """ :returns: The board of the game and its status as a string. """
+    width, codes = game.width, game.state.codes
+    # Column numbers are written vertically, one digit per line, so they line up with the single character squares.
+    digits = len(str(width - 1))
+    margin = ' ' * (len(str(game.height - 1)) + 1)
+    lines = [margin + ''.join(str(x).rjust(digits)[k] for x in range(width)) for k in range(digits)]
+    for y in range(game.height):
+        lines.append(str(y).rjust(len(margin) - 1) + ' ' + codes[y*width:(y+1)*width].translate(_TABLE).decode())
+    status = 'won' if game.done and game.is_won() else 'lost' if game.done else 'playing'
+    lines.append('mines left: {}, time: {}, {}'.format(game.mines_left, int(game.time()), status))
+    return '\n'.join(lines)
+
+
+def play(game, lines=None, out=None):
+    """ Play a game by reading commands, see the module's documentation, and writing the board after every command.
+        :param lines: An iterable of command lines, defaults to stdin.
+        :param out: The text file to write to, defaults to stdout.
+    """
+    lines = sys.stdin if lines is None else lines
+    out = sys.stdout if out is None else out
+    out.write(render(game) + '\n' + HELP + '\n')
+    for line in lines:
+        words = line.split()
+        if not words:
+            continue
+        command, arguments = (words[0], words[1:]) if not words[0].isdigit() else ('s', words)
+        if command == 'exit':
+            break
+        try:
+            if command in ('s', 'f', 'q'):
+                if len(arguments) != 2:
+                    raise ValueError('Expected the x and y coordinates.')
+                x, y = map(int, arguments)
+                if not (0 <= x < game.width and 0 <= y < game.height):
+                    raise ValueError('The square is not on the board.')
+                {'s': game.select, 'f': game.flag, 'q': game.question}[command](x, y)
+            elif command == 'u':
+                game.undo()
+            elif command == 'r':
+                game.redo()
+            elif command == 'n':
+                game.reset()
+            else:
+                raise ValueError('Unknown command, ' + HELP)
+        except ValueError as e:
+            out.write('{}\n'.format(e))
+            continue
+        out.write(render(game) + '\n')
+        out.flush()
+
+
+def main(args):
+    """ Play in the terminal, from the parsed command line arguments. """
+    game = Minesweeper(debug=args.debug_mode, seed=args.seed, history=True)
+    game.set_config(args.difficulty, getattr(args, 'width', None), getattr(args, 'height', None),
+                    getattr(args, 'num_mines', None))
+    try:
+        play(game)
+    except KeyboardInterrupt:
+        pass
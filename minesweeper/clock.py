@@ -0,0 +1,253 @@
+""" Pluggable clocks for the game timer. A clock tells the time and schedules callbacks, which is all a `Minesweeper` game
+    needs to keep its timer and notify its listeners every second. Pick the clock that matches the program that hosts
+    the games:
+    - `SharedClock`: Monotonic time, with a single scheduler thread that runs the callbacks of all games. The default,
+      as it keeps the number of threads constant no matter how many games a process hosts.
+    - `ThreadingClock`: Wall-clock time, with a `threading.Timer` per scheduled callback.
+    - `AsyncioClock`: The time of an asyncio event loop, with callbacks scheduled on that loop.
+    - `VirtualClock`: A manual clock that only moves when it's told to, and runs callbacks synchronously as it does.
+      It uses no threads at all, so simulations and tests run at full speed and deterministically.
+    - `gui.qt_clock.QtClock`: A Qt `QTimer` based clock, which runs callbacks in the GUI thread.
+
+    A clock's `call_later` returns a handle with a `cancel` method. Callbacks are only ever run once.
+"""
+from heapq import heappop, heappush
+from itertools import count
+from threading import Condition, Thread, Timer
+import time
+
+
+class Clock:
+    """ The interface of a clock. Times are in seconds, but only differences between them are meaningful. """
+    def now(self):
+        """ :returns: The current time. """
+        raise NotImplementedError
+
+    def call_later(self, delay, callback):
+        """ Call `callback` without arguments after `delay` seconds.
+            :returns: A handle with a `cancel` method, to cancel the call if it hasn't happened yet.
+        """
+        raise NotImplementedError
+
+
+class ThreadingClock(Clock):
+    """ Wall-clock time, with a new `threading.Timer` for every callback. Callbacks run in the timer's thread. """
+    def now(self):
+        return time.time()
+
+    def call_later(self, delay, callback):
+        timer = Timer(delay, callback)
+        timer.daemon = True
+        timer.start()
+        return timer
+
+
+class _SharedHandle:
+    """ A callback that was scheduled on a `SharedClock`, which doubles as its entry in the clock's heap. """
+    __slots__ = ('due', 'order', 'callback', 'index', 'clock')
+
+    def __init__(self, due, order, callback, clock):
+        self.due = due
+        self.order = order          # Breaks ties between callbacks with the same due time.
+        self.callback = callback
+        self.index = -1             # The position in the heap, -1 if it's not in the heap.
+        self.clock = clock
+
+    def __lt__(self, other):
+        return (self.due, self.order) < (other.due, other.order)
+
+    def cancel(self):
+        self.clock._cancel(self)
+
+
+class SharedClock(Clock):
+    """ Monotonic time, with a single daemon thread that runs the callbacks of every game that uses the clock. The
+        callbacks are kept in a binary heap that tracks the position of every entry, so scheduling and cancelling are
+        both O(log n). The thread is only started once the first callback is scheduled.
+
+        Callbacks run one after the other in the scheduler thread, so they should be quick, e.g. emit a signal or put an
+        event on a queue, as a slow callback delays all others.
+
+        Attributes:
+        _condition  The `Condition` that guards the heap and wakes up the scheduler thread.
+        _counter    A counter that breaks ties between callbacks with the same due time.
+        _heap       The binary heap of `_SharedHandle`s, ordered by due time.
+        _thread     The scheduler thread, None if it hasn't been started yet.
+    """
+    def __init__(self):
+        self._heap = []
+        self._condition = Condition()
+        self._counter = count()
+        self._thread = None
+
+    def now(self):
+        return time.monotonic()
+
+    def call_later(self, delay, callback):
+        handle = _SharedHandle(time.monotonic() + max(delay, 0), next(self._counter), callback, self)
+        with self._condition:
+            heap = self._heap
+            handle.index = len(heap)
+            heap.append(handle)
+            self._sift_up(handle.index)
+            # Only wake up the scheduler when its next wake-up moves forward.
+            if heap[0] is handle:
+                self._condition.notify()
+            if self._thread is None:
+                self._thread = Thread(target=self._run, name='SharedClock', daemon=True)
+                self._thread.start()
+        return handle
+
+    def pending(self):
+        """ :returns: The number of callbacks that are scheduled. """
+        with self._condition:
+            return len(self._heap)
+
+    def _cancel(self, handle):
+        """ Remove a handle from the heap, if it's still in there. """
+        with self._condition:
+            self._remove(handle)
+
+    def _remove(self, handle):
+        """ Remove a handle from the heap by moving the last entry into its place. The condition's lock must be held. """
+        heap, i = self._heap, handle.index
+        if i < 0:
+            return
+        handle.index = -1
+        last = heap.pop()
+        if last is not handle:
+            heap[i] = last
+            last.index = i
+            self._sift_up(i)
+            self._sift_down(last.index)
+
+    def _sift_up(self, i):
+        heap = self._heap
+        entry = heap[i]
+        while i:
+            parent = (i - 1) >> 1
+            if not entry < heap[parent]:
+                break
+            heap[i] = heap[parent]
+            heap[i].index = i
+            i = parent
+        heap[i] = entry
+        entry.index = i
+
+    def _sift_down(self, i):
+        heap = self._heap
+        entry, size = heap[i], len(heap)
+        while True:
+            child = 2*i + 1
+            if child >= size:
+                break
+            if child + 1 < size and heap[child + 1] < heap[child]:
+                child += 1
+            if not heap[child] < entry:
+                break
+            heap[i] = heap[child]
+            heap[i].index = i
+            i = child
+        heap[i] = entry
+        entry.index = i
+
+    def _run(self):
+        """ The scheduler thread, which runs every callback once it's due. """
+        condition, heap = self._condition, self._heap
+        while True:
+            with condition:
+                while True:
+                    if not heap:
+                        condition.wait()
+                        continue
+                    wait = heap[0].due - time.monotonic()
+                    if wait <= 0:
+                        break
+                    condition.wait(wait)
+                handle = heap[0]
+                self._remove(handle)
+            # The callback runs without holding the lock, so it can schedule its next call. An exception only ends the
+            # callback, as the thread is shared by all games.
+            try:
+                handle.callback()
+            except Exception:
+                # Only imported when needed, as it's slow to import and the clock is imported on startup.
+                from traceback import print_exc
+                print_exc()
+
+
+class AsyncioClock(Clock):
+    """ The time of an asyncio event loop, with callbacks scheduled on that loop. It must only be used from the loop's
+        own thread.
+
+        Attributes:
+        loop  The event loop, None to use the loop that's running when the clock is used.
+    """
+    def __init__(self, loop=None):
+        self.loop = loop
+
+    def _loop(self):
+        if self.loop is not None:
+            return self.loop
+        # Imported here, so asyncio is only loaded when it's used.
+        import asyncio
+        return asyncio.get_running_loop()
+
+    def now(self):
+        return self._loop().time()
+
+    def call_later(self, delay, callback):
+        return self._loop().call_later(delay, callback)
+
+
+class _VirtualHandle:
+    """ The handle of a callback that was scheduled on a `VirtualClock`. """
+    __slots__ = ('cancelled',)
+
+    def __init__(self):
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class VirtualClock(Clock):
+    """ A manual clock, that only moves forward when `advance` is called. Callbacks are run synchronously by `advance`,
+        in the order of their due time, with the clock set to that due time while each of them runs.
+
+        Attributes:
+        _counter  A counter that breaks ties between callbacks with the same due time, so they run in scheduling order.
+        _queue    A heap of (due time, counter, handle, callback) tuples of the scheduled callbacks.
+        _time     The current time.
+    """
+    def __init__(self, start=0.0):
+        self._time = start
+        self._queue = []
+        self._counter = count()
+
+    def now(self):
+        return self._time
+
+    def call_later(self, delay, callback):
+        handle = _VirtualHandle()
+        heappush(self._queue, (self._time + max(delay, 0), next(self._counter), handle, callback))
+        return handle
+
+    def advance(self, seconds):
+        """ Move the clock forward, running all callbacks that become due along the way, including the ones that those
+            callbacks schedule themselves.
+            :returns: The number of callbacks that were run.
+        """
+        if seconds < 0:
+            raise ValueError("A virtual clock can't move backwards.")
+        end = self._time + seconds
+        queue = self._queue
+        run = 0
+        while queue and queue[0][0] <= end:
+            due, _, handle, callback = heappop(queue)
+            if not handle.cancelled:
+                self._time = due
+                callback()
+                run += 1
+        self._time = end
+        return run
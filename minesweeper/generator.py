@@ -0,0 +1,70 @@
+""" Generate many boards of the same size at once, e.g. to pre-generate pools of boards for testing and training. The
+    boards are returned as compact NumPy arrays, which can be fed to `Minesweeper.set_mines` or `BatchMinesweeper`.
+
+    This module requires NumPy.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from .seeding import SeedSequence
+
+# The (dx, dy) offsets of a square's neighbors, ordered column by column, row by row, like
+# `Minesweeper.valid_neighbors`.
+NEIGHBOR_OFFSETS = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
+
+# A tuple to store generated boards in.
+# :param mines: A uint8 array of shape (K, height, width), where 1 marks where mines are located.
+# :param numbers: A uint8 array of shape (K, height, width) with the number of neighboring mines of each square.
+Boards = namedtuple('Boards', 'mines, numbers')
+
+
+def default_rng(seed=None):
+    """ Create a NumPy random number generator.
+        :param seed: An integer, a `SeedSequence`, an existing `numpy.random.Generator` or None for a random seed.
+    """
+    if isinstance(seed, np.random.Generator):
+        return seed
+    if seed is None:
+        seed = SeedSequence()
+    if isinstance(seed, SeedSequence):
+        seed = seed.generate_seed()
+    return np.random.default_rng(seed)
+
+
+def generate_boards(count, width, height, num_mines, safe=None, rng=None):
+    """ Generate `count` boards with uniformly placed mines. Every square gets a random key and the mines are placed on
+        the squares with the smallest keys, found with a single `argpartition` over all boards. Safe squares get a key
+        that's larger than any random key, so they're never picked.
+        :param safe: The square of each board that should remain free from mines; either a single (x, y) tuple for all
+                     boards, an integer array of shape (count, 2) with an (x, y) square per board, or None for no safe
+                     squares.
+        :param rng: The random number generator or seed to use, see `default_rng`.
+        :returns: The generated `Boards`.
+    """
+    size = width*height
+    if not 0 < num_mines <= (size if safe is None else size - 1):
+        raise ValueError("The number of mines doesn't fit on the board.")
+    keys = default_rng(rng).random((count, size))
+    if safe is not None:
+        safe = np.broadcast_to(np.asarray(safe, np.intp), (count, 2))
+        keys[np.arange(count), safe[:, 1]*width + safe[:, 0]] = 2
+    chosen = np.argpartition(keys, num_mines - 1, axis=1)[:, :num_mines]
+    mines = np.zeros((count, size), np.uint8)
+    np.put_along_axis(mines, chosen, 1, axis=1)
+    mines = mines.reshape(count, height, width)
+    return Boards(mines, count_neighbors(mines))
+
+
+def count_neighbors(mines):
+    """ Count the neighboring mines of every square for a stack of boards at once, with a 3x3 convolution that's
+        implemented as a sum of shifted slices of the padded boards.
+        :param mines: An array of shape (K, height, width), where 1 or True marks where mines are located.
+        :returns: A uint8 array of the same shape.
+    """
+    height, width = mines.shape[1:]
+    padded = np.pad(mines.astype(np.uint8, copy=False), ((0, 0), (1, 1), (1, 1)))
+    counts = np.zeros(mines.shape, np.uint8)
+    for dx, dy in NEIGHBOR_OFFSETS:
+        counts += padded[:, 1 + dy:1 + dy + height, 1 + dx:1 + dx + width]
+    return counts
@@ -0,0 +1,142 @@
+""" The geometry of a minesweeper board: which squares there are and which squares neighbor each other. The geometry
+    only depends on the board's width and height, so it's computed once and shared by every game of that size.
+"""
+from array import array
+from collections import OrderedDict
+from itertools import product
+from threading import Lock
+
+# The maximum total number of squares of the geometries that `Geometry.of` keeps around. The neighbor tables take about
+# 36 bytes per square, so this bounds the cache to about 36 MB, however many board sizes are used.
+CACHE_SQUARES = 1000000
+# The cached geometries by (width, height), in least recently used order, and the lock that guards them.
+_cache = OrderedDict()
+_cache_lock = Lock()
+
+
+class Geometry:
+    """ The immutable geometry of a board of a given size. Squares are referred to by their flat index `y*width + x`.
+        The neighbor tables are stored CSR-style: the neighbors of square `i` are `indices[offsets[i]:offsets[i+1]]`,
+        ordered column by column, row by row, like `Minesweeper.valid_neighbors`. The tables and the coordinate list
+        are only built on first use, as they take up a fair amount of memory for large boards: the offsets take 4
+        bytes per square and the indices 4 bytes per neighbor, about 36 bytes per square in total, next to the single
+        byte per square of a game's state. Building them takes about 0.15 seconds per million squares, and the
+        coordinates, which are only used by the solvers, take a lot more memory still.
+        Use `Geometry.of` to get the shared instance for a board size, instead of creating one directly.
+
+        Attributes:
+        coordinates  A tuple of all (x, y) coordinate pairs on the board, ordered column by column, row by row.
+        height       The number of squares along the height.
+        indices      An `array` with the flat indices of the neighbors of all squares, concatenated.
+        offsets      An `array` of `size + 1` offsets into `indices`, where the neighbors of each square start.
+        size         The total number of squares.
+        width        The number of squares along the width.
+    """
+    __slots__ = ('width', 'height', 'size', '_offsets', '_indices', '_coordinates')
+
+    def __init__(self, width, height):
+        object.__setattr__(self, 'width', width)
+        object.__setattr__(self, 'height', height)
+        object.__setattr__(self, 'size', width*height)
+        object.__setattr__(self, '_offsets', None)
+        object.__setattr__(self, '_indices', None)
+        object.__setattr__(self, '_coordinates', None)
+
+    @staticmethod
+    def of(width, height):
+        """ :returns: The shared `Geometry` for a board of the given size. The geometries of the most recently used
+                      sizes are kept, up to `CACHE_SQUARES` squares in total. A board that's larger than that gets a
+                      geometry of its own, which is freed along with the games that use it.
+        """
+        key = width, height
+        with _cache_lock:
+            geometry = _cache.get(key)
+            if geometry is not None:
+                _cache.move_to_end(key)
+                return geometry
+            geometry = Geometry(width, height)
+            if geometry.size <= CACHE_SQUARES:
+                _cache[key] = geometry
+                total = sum(cached.size for cached in _cache.values())
+                while total > CACHE_SQUARES:
+                    total -= _cache.popitem(last=False)[1].size
+            return geometry
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Geometry objects are immutable.')
+
+    def __repr__(self):
+        return 'Geometry(width={}, height={})'.format(self.width, self.height)
+
+    @property
+    def offsets(self):
+        if self._indices is None:
+            self._build_neighbors()
+        return self._offsets
+
+    @property
+    def indices(self):
+        if self._indices is None:
+            self._build_neighbors()
+        return self._indices
+
+    @property
+    def coordinates(self):
+        if self._coordinates is None:
+            object.__setattr__(self, '_coordinates', tuple(product(range(self.width), range(self.height))))
+        return self._coordinates
+
+    def neighbors(self, i):
+        """ :returns: The flat indices of the neighbors of the square with flat index `i`. """
+        offsets = self.offsets
+        return self.indices[offsets[i]:offsets[i+1]]
+
+    def count_mines(self, mines):
+        """ Count the neighboring mines of every square in a single pass over the mines.
+            :param mines: The mines as a flat `bytearray`, where 1 marks where mines are located.
+            :returns: The number of neighboring mines of every square as a flat `bytearray`.
+        """
+        offsets, indices = self.offsets, self.indices
+        numbers = bytearray(self.size)
+        i = mines.find(1)
+        while i != -1:
+            for p in range(offsets[i], offsets[i+1]):
+                numbers[indices[p]] += 1
+            i = mines.find(1, i+1)
+        return numbers
+
+    def _build_neighbors(self):
+        """ Build the CSR neighbor tables, a row at a time. The squares on the left and right edge are done one by one,
+            but all other squares of a row have their neighbors at the same offsets, so each of those offsets is filled
+            in for the whole row at once, as a range that's assigned to every n-th entry.
+        """
+        width, height = self.width, self.height
+        offsets = array('i', [0])
+        indices = array('i')
+        # The ranges by their first index, each one is used by up to three rows.
+        ranges = {}
+        for y in range(height):
+            ys = range(max(y-1, 0), min(y+2, height))
+            edges = [[yi*width + xi for xi in range(max(x-1, 0), min(x+2, width)) for yi in ys if xi != x or yi != y]
+                     for x in sorted({0, width - 1})]
+            indices.extend(edges[0])
+            offsets.append(len(indices))
+            if width > 2:
+                pattern = [yi*width + dx for dx in (-1, 0, 1) for yi in ys if dx or yi != y]
+                n = len(pattern)
+                row = array('i', bytes(n*(width - 2)*offsets.itemsize))
+                for k, delta in enumerate(pattern):
+                    if delta not in ranges:
+                        ranges[delta] = array('i', range(delta + 1, delta + width - 1))
+                    row[k::n] = ranges[delta]
+                # Drop the ranges of the row above, which no later row uses.
+                for delta in range((y-1)*width - 1, (y-1)*width + 2):
+                    ranges.pop(delta, None)
+                offsets.extend(range(len(indices) + n, len(indices) + n*(width - 2) + 1, n))
+                indices.extend(row)
+            if width > 1:
+                indices.extend(edges[-1])
+                offsets.append(len(indices))
+        # Set the indices last, as their presence is what marks the tables as built.
+        object.__setattr__(self, '_offsets', offsets)
+        object.__setattr__(self, '_indices', indices)
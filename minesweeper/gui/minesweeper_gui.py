@@ -6,7 +6,8 @@ from PyQt5.QtGui import QPixmap, QPixmapCache
 from PyQt5.QtCore import pyqtSignal, pyqtSlot
 
 from .components import MainWindow, ResetButton, Minefield, SevenSegmentDisplay
-from . import resources     # Loads the resources, even though the module is not directly referenced.
+from .resource_loader import load_resources
+from .qt_clock import QtClock
 from .. import Minesweeper
 
 
@@ -21,9 +22,11 @@ class MinesweeperGUI(QApplication):
 
     def __init__(self, debug_mode=False, difficulty='expert', **kwargs):
         super().__init__([])
+        # The images have to be registered before any of the components use them.
+        load_resources()
         if debug_mode:
             self.enable_qt_exceptions()
-        self.game = Minesweeper()
+        self.game = Minesweeper(debug=debug_mode, clock=QtClock())
         self.setup_cache()
         self.main_window = MainWindow(debug_mode)
         self.connect_interface(debug_mode)
@@ -71,7 +74,7 @@ class MinesweeperGUI(QApplication):
         # Debug mode extras.
         if debug_mode:
             self.main_window.findChild(QAction, 'log_state').triggered.connect(lambda: print(self.game.state))
-            self.main_window.findChild(QAction, 'log_mines').triggered.connect(lambda: print(self.game._mines))
+            self.main_window.findChild(QAction, 'log_mines').triggered.connect(lambda: print(self.game.mines))
 
     @staticmethod
     def setup_cache():
@@ -0,0 +1,46 @@
+""" A `Clock` on top of Qt's timers, so the game timer's listeners run in the GUI thread. """
+from PyQt5.QtCore import QElapsedTimer, QTimer
+
+from ..clock import Clock
+
+
+class _QtHandle:
+    """ The handle of a callback that was scheduled on a `QtClock`. """
+    __slots__ = ('timer', 'pending')
+
+    def __init__(self, timer, pending):
+        self.timer = timer
+        self.pending = pending      # The clock's set of pending timers.
+
+    def cancel(self):
+        self.timer.stop()
+        self.pending.discard(self.timer)
+
+
+class QtClock(Clock):
+    """ A monotonic clock, with a single shot `QTimer` per callback. It must only be used from the GUI thread.
+
+        Attributes:
+        _elapsed  The `QElapsedTimer` that tells the time.
+        _timers   The timers that are still pending, to keep them alive until they fire or are cancelled.
+    """
+    def __init__(self):
+        self._elapsed = QElapsedTimer()
+        self._elapsed.start()
+        self._timers = set()
+
+    def now(self):
+        return self._elapsed.msecsSinceReference() / 1000
+
+    def call_later(self, delay, callback):
+        timer = QTimer()
+        timer.setSingleShot(True)
+        timer.setTimerType(QTimer.PreciseTimer)
+
+        def fire():
+            self._timers.discard(timer)
+            callback()
+        timer.timeout.connect(fire)
+        self._timers.add(timer)
+        timer.start(max(round(delay * 1000), 0))
+        return _QtHandle(timer, self._timers)
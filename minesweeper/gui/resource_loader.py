@@ -0,0 +1,67 @@
+""" Registers the GUI's images with Qt's resource system, so they can be loaded from paths like ':flag.png'.
+
+    The images are registered from `resources.rcc`, a binary resource file that Qt memory-maps, so nothing is copied
+    into the process until an image is actually used. Images are then only decoded the first time they're looked up,
+    see `MinesweeperGUI.setup_cache`. If the file is missing or can't be registered, the resources are registered from
+    the compiled `resources.py` module instead, which embeds all images as a bytes literal that has to be loaded in full.
+
+    The binary resource file is built from `resources.py`, so both always hold the same images. After recompiling
+    `resources.py` from `assets/resources.qrc` with `pyrcc5`, rebuild it by running this file as a script, which doesn't
+    need Qt: `python minesweeper/gui/resource_loader.py`
+"""
+import ast
+from os.path import dirname, join
+from struct import Struct
+
+# The binary resource file that's registered by default.
+RCC_PATH = join(dirname(__file__), 'resources.rcc')
+# The compiled resource module that the binary resource file is built from.
+MODULE_PATH = join(dirname(__file__), 'resources.py')
+# The header of a binary resource file: the magic, the format version and the offsets of the tree, data and names.
+RCC_HEADER = Struct('>4sIIII')
+_RCC_MAGIC = b'qres'
+# The version of the resource tree in `resources.py` that's used, which adds modification times to the tree's nodes.
+_RCC_VERSION = 2
+
+
+def load_resources(path=RCC_PATH):
+    """ Register the GUI's resources, from the binary resource file if possible, otherwise from `resources.py`.
+        :param path: The path of the binary resource file.
+        :returns: The path of the file that the resources were registered from.
+    """
+    from PyQt5.QtCore import QResource
+    if QResource.registerResource(path):
+        return path
+    # Registers the resources as soon as it's imported.
+    from . import resources
+    return resources.__file__
+
+
+def build_rcc(source=MODULE_PATH, target=RCC_PATH):
+    """ Build a binary resource file from the resource data that `pyrcc5` compiled into a Python module. The module is
+        parsed rather than imported, so Qt isn't needed.
+        :param source: The path of the compiled resource module.
+        :param target: The path to write the binary resource file to.
+    """
+    with open(source, encoding='utf-8') as f:
+        module = ast.parse(f.read())
+    names = {'qt_resource_data', 'qt_resource_name', 'qt_resource_struct_v2'}
+    literals = {node.targets[0].id: ast.literal_eval(node.value) for node in module.body
+                if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name)
+                and node.targets[0].id in names}
+    if set(literals) != names:
+        raise ValueError('{} is not a compiled resource module.'.format(source))
+    data, name, tree = literals['qt_resource_data'], literals['qt_resource_name'], literals['qt_resource_struct_v2']
+    # The sections are stored in the same order as Qt's rcc does: the data, the names and then the tree.
+    data_offset = RCC_HEADER.size
+    name_offset = data_offset + len(data)
+    tree_offset = name_offset + len(name)
+    with open(target, 'wb') as f:
+        f.write(RCC_HEADER.pack(_RCC_MAGIC, _RCC_VERSION, tree_offset, data_offset, name_offset))
+        f.write(data)
+        f.write(name)
+        f.write(tree)
+
+
+if __name__ == '__main__':
+    build_rcc()
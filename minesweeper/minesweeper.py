@@ -6,12 +6,43 @@
     version, the mine under the mouse is moved to the upper-left corner. In this implementation, mines are uniformly
     distributed in all squares without bias.
 """
-from random import sample
-from itertools import chain, product
 from collections import namedtuple
-import time
-from threading import Timer
+from random import Random
+from itertools import repeat
 from math import ceil
+from mmap import ACCESS_READ, mmap
+from struct import Struct
+
+from .clock import SharedClock
+from .geometry import Geometry
+from .placement import place_mines
+from .seeding import SeedSequence
+from .board import (CLOSED, QUESTION, FLAG, MINE, MINE_HIT, FLAG_WRONG, DECODE, ENCODE, GridView, pack_bits,
+                    pack_nibbles, unpack_bits, unpack_nibbles)
+
+# The clock of games that aren't given one, whose single thread drives the timers of all of those games.
+_DEFAULT_CLOCK = SharedClock()
+# The (width, height, num_mines) of each of the preset difficulties.
+DIFFICULTIES = {
+    'beginner': (8, 8, 10),
+    'intermediate': (16, 16, 40),
+    'expert': (30, 16, 99),
+}
+
+
+def board_size(difficulty, width=None, height=None, num_mines=None):
+    """ Look up the board size of a difficulty setting. For the 'custom' difficulty, the given width, height and number
+        of mines are checked and returned.
+        :returns: A (width, height, num_mines) tuple.
+    """
+    if difficulty in DIFFICULTIES:
+        return DIFFICULTIES[difficulty]
+    elif difficulty == 'custom':
+        if not (0 < num_mines < width*height):
+            raise ValueError("The number of mines doesn't make sense, 0 < num_mines < width*height")
+        return width, height, num_mines
+    else:
+        raise ValueError('Invalid difficulty setting!')
 
 
 class Minesweeper:
@@ -19,20 +50,48 @@ class Minesweeper:
 
         Attributes:
         _listeners        A list of callables that will be called when the timer changes.
+        _move_listeners   A list of callables that will be called after every move, see `add_move_listener`.
+        _questions        A set of the flat indices of the squares with a question mark, kept while the history is
+                          enabled to tell which squares had one before a move opened them.
+        _redo_log         A list of the moves that were undone, as `_undo_log` entries, None if the history is disabled.
+        _undo_log         A list of (indices, old, new, before, after, placed) entries of the moves that can be undone,
+                          None if the history is disabled. `indices` holds the flat indices of the changed squares and
+                          `old` and `new` their state codes before and after the move. `before` and `after` hold the
+                          counters, see `_counters`, and `placed` the (mines, numbers) if the move placed the mines.
+        _geometry         The shared `Geometry` of the board, holding the neighbor tables and coordinate list.
         _final_time       The final timer time when the game ended, None if the game hasn't ended yet.
-        _mines            The ground truth of mines; a 2D nested list of boolean values, where True marks where mines
-                          are located.
+        _opened           The number of safe squares that have been opened, which is kept up to date by `select` to
+                          make `is_won` a constant time check.
+        _mines            The ground truth of mines; a flat, row-major `bytearray` where 1 marks where mines are
+                          located, None if the mines haven't been placed yet.
+        pool              The `pool.BoardPool` to take pre-generated boards from on the first `select`, None to always
+                          generate the boards in the game itself.
         num_mines         The number of mines a game starts with when it's reset (for the number of mines left, see
                           `mines_left`).
         _start_time       The time at which the first square was opened (for the timer value, see `time`), None if
                           no square has been opened yet.
-        _scheduler        A `threading.Timer` object to update observers about timer changes.
+        _scheduler        The handle of the callback that's scheduled on `clock` to update observers about timer changes,
+                          None if there is none.
+        clock             The `clock.Clock` that the timer reads the time from and schedules its updates on.
+        debug             Whether to cross-check the `_opened` counter against a full scan of the state whenever
+                          `is_won` is called, raising a `RuntimeError` if they disagree.
         difficulty        The set difficulty setting, must be either 'beginner', 'intermediate', 'expert' or 'custom'.
         done              Whether the game has ended.
         first_never_mine  Whether the first click can hit a mine.
+        guess_free        Whether to only generate boards that can be solved without guessing from the first click.
+                          The first click is then always safe.
+        guess_free_timeout The maximum time to spend on generating a guess-free board, in seconds, None for no limit.
+                          When it runs out, a regular board is used instead.
         height            The number of squares along the height.
         mines_left        The number of mines that are left unmarked in the game.
-        state             A 2D nested list of the game's state, which is relayed to the user. The following states are
+        _rng              The `random.Random` instance that the mine layouts are drawn from.
+        seed              The seed that `_rng` was seeded with, None if a `random.Random` instance was passed instead.
+                          Games created with the same seed go through the same sequence of mine layouts.
+        _numbers          The number of neighboring mines of every square; a flat, row-major `bytearray` that is
+                          computed when the mines are placed, None if the mines haven't been placed yet.
+        _state            The game's state as a flat, row-major `bytearray` of the state codes in `board`.
+        state             A `GridView` on `_state` that can be indexed as a 2D nested list of the game's state
+                          (`state[y][x]`), which is relayed to the user. The following states are
                           possible for individual squares: None for an unopened square, an integer [0-8] for opened
                           squares, 'flag' for squares with a flag placed on them, 'mine_hit' for a square that was
                           opened with a mine under it, 'mine' for any unflagged squares with a mine under them after
@@ -40,49 +99,108 @@ class Minesweeper:
                           'mine_hit' and 'flag_wrong' will only appear if you've lost the game.
         width             The number of squares along the width.
     """
-    def __init__(self, difficulty='intermediate'):
+    def __init__(self, difficulty='intermediate', debug=False, seed=None, rng=None, pool=None, clock=None,
+                 history=False):
         """ Start a minesweeper instance. A default instance will be generated with difficulty='intermediate' and
             first_never_mine=True.
+            :param debug: Whether to enable the (slow) consistency checks, see `debug`.
+            :param seed: The seed for the mine layouts as an integer or a `SeedSequence`, None for a random seed.
+            :param rng: A `random.Random` instance to draw the mine layouts from, instead of seeding a new one.
+            :param pool: A `pool.BoardPool` to take the mine layouts from when it has one ready, see `pool`. The layouts
+                         are then drawn from the pool's generator instead, so they no longer follow from the seed.
+            :param clock: The `clock.Clock` for the timer, None for the process-wide `clock.SharedClock`. Pass a
+                          `clock.VirtualClock` to run games without any threads, e.g. in simulations.
+            :param history: Whether to keep a log of the changes of every move, to support `undo`, `redo`, `checkpoint`
+                            and `rollback`.
         """
+        self.debug = debug
+        self.clock = clock if clock is not None else _DEFAULT_CLOCK
+        self.pool = pool
         self._scheduler = None      # The timer used to update observers about timer changes.
         self._listeners = []    # The listeners that will get updated about timer changes.
-        self._mines = None      # Will hold the ground truth for mine locations as a 2D nested list of booleans.
-        self.set_config(difficulty, first_never_mine=True)
+        self._move_listeners = []   # The listeners that will get updated about moves.
+        self._undo_log = [] if history else None
+        self._redo_log = [] if history else None
+        self._questions = set()
+        self._mines = None      # Will hold the ground truth for mine locations as a flat `bytearray`.
+        self._rng = None        # Will hold the random number generator for the mine layouts.
+        self.set_config(difficulty, first_never_mine=True, seed=seed, rng=rng, guess_free=False, guess_free_timeout=5)
 
-    def set_config(self, difficulty=None, width=None, height=None, num_mines=None, first_never_mine=None):
+    def set_config(self, difficulty=None, width=None, height=None, num_mines=None, first_never_mine=None, seed=None,
+                   rng=None, guess_free=None, guess_free_timeout=None):
         """ Set the difficulty to one of three presets: 'beginner', 'intermediate' and 'expert'. It's also possible to
             set the difficulty to 'custom', where you can, and have to, specify the width, height and the number of
-            mines yourself.
+            mines yourself. Passing a `seed` or `rng` reseeds the mine layouts, otherwise the current generator is kept.
+            Guess-free generation runs a solver on every candidate board, see `solver.guess_free` for its throughput.
         """
+        if rng is not None:
+            self._rng = rng
+            self.seed = None
+        elif seed is not None or self._rng is None:
+            if seed is None:
+                seed = SeedSequence()
+            if isinstance(seed, SeedSequence):
+                seed = seed.generate_seed()
+            self._rng = Random(seed)
+            self.seed = seed
         if difficulty is not None:
-            if difficulty == 'beginner':
-                width, height, num_mines = 8, 8, 10
-            elif difficulty == 'intermediate':
-                width, height, num_mines = 16, 16, 40
-            elif difficulty == 'expert':
-                width, height, num_mines = 30, 16, 99
-            elif difficulty == 'custom':
-                if not (0 < num_mines < width*height):
-                    raise ValueError("The number of mines doesn't make sense, 0 < num_mines < width*height")
-            else:
-                raise ValueError('Invalid difficulty setting!')
+            width, height, num_mines = board_size(difficulty, width, height, num_mines)
             self.difficulty = difficulty
             self.height = height            # The height of each game.
             self.width = width              # The width of each game.
             self.num_mines = num_mines      # The number of mines to place on the board.
+            self._geometry = Geometry.of(width, height)
         if first_never_mine is not None:
             self.first_never_mine = first_never_mine
+        if guess_free is not None:
+            self.guess_free = guess_free
+        if guess_free_timeout is not None:
+            self.guess_free_timeout = guess_free_timeout
         self.reset()
 
     def reset(self):
         """ Starts a new game. """
+        if self._move_listeners:
+            self._notify_move('reset', None, None)
         # Generate an empty state.
         self._mines = None
-        self.state = [[None for _ in range(self.width)] for _ in range(self.height)]
+        self._numbers = None
+        self._state = bytearray([CLOSED]) * (self.width*self.height)
+        self.state = GridView(self._state, self.width, self.height, DECODE)
         self.done = False
+        self._opened = 0
         self.mines_left = self.num_mines
         self._start_time = None
         self._final_time = None
+        self._stop_scheduler()
+        if self._undo_log is not None:
+            self._undo_log.clear()
+            self._redo_log.clear()
+            self._questions.clear()
+
+    @property
+    def opened_count(self):
+        """ The number of safe squares that have been opened. """
+        return self._opened
+
+    @property
+    def mines(self):
+        """ A read-only `GridView` on the ground truth of the mines, indexed as `mines[y][x]`, None if the mines haven't
+            been placed yet. Its `codes` are a read-only `memoryview`, so the mines can't be changed through it.
+        """
+        if self._mines is None:
+            return None
+        return GridView(memoryview(self._mines).toreadonly(), self.width, self.height, (False, True))
+
+    @property
+    def numbers(self):
+        """ A read-only `GridView` on the number of neighboring mines of every square, indexed as `numbers[y][x]`, None
+            if the mines haven't been placed yet. The numbers of squares with a mine on them are included as well. Its
+            `codes` are a read-only `memoryview`, so the numbers can't be changed through it.
+        """
+        if self._numbers is None:
+            return None
+        return GridView(memoryview(self._numbers).toreadonly(), self.width, self.height)
 
     def _setup_mines(self, safe_square=None):
         """ Setup the mines, not the state. The safe square allows generating a mine pattern that provides the
@@ -90,15 +208,49 @@ class Minesweeper:
             :param safe_square: The square that should remain free from mines as an (x, y) tuple, None if there should
                                 not be such a square.
         """
-        self._mines = [[False for _ in range(self.width)] for _ in range(self.height)]
-        # Generate all square positions.
-        possible_squares = self.squares()
-        # Make the safe square impossible if set.
-        if safe_square is not None:
-            possible_squares.remove(safe_square)
-        # Select `self.num_mines` random coordinates to place mines at.
-        for x, y in sample(possible_squares, self.num_mines):
-            self._mines[y][x] = True
+        if self.pool is not None:
+            policy = 'guess_free' if self.guess_free else 'none' if safe_square is None else 'safe'
+            board = self.pool.take(self.width, self.height, self.num_mines, policy, safe_square)
+            if board is not None:
+                self.set_mines(*board)
+                return
+        if self.guess_free and safe_square is not None:
+            # Imported here, so the solver is only loaded when it's used.
+            from .solver.guess_free import generate_guess_free
+            mines = generate_guess_free(self.width, self.height, self.num_mines, safe_square, self._rng,
+                                        self.guess_free_timeout)
+            if mines is not None:
+                self.set_mines(mines)
+                return
+        safe = None if safe_square is None else safe_square[1]*self.width + safe_square[0]
+        self._mines = place_mines(self.width*self.height, self.num_mines, safe, self._rng)
+        self._compute_numbers()
+
+    def set_mines(self, mines, numbers=None):
+        """ Use a predetermined mine layout for the current game, instead of placing the mines on the first select, e.g.
+            a board from `generator.generate_boards`. It can only be used before the mines have been placed.
+            :param mines: The mines as a flat, row-major bytes-like object of length width*height, where 1 marks where
+                          mines are located, e.g. a `bytearray` or a uint8 NumPy array.
+            :param numbers: The matching number of neighboring mines of every square in the same layout, None to
+                            compute them.
+        """
+        if self._mines is not None:
+            raise ValueError('The mines have already been placed.')
+        mines = bytearray(mines)
+        if len(mines) != self.width*self.height or mines.count(1) != self.num_mines or \
+                mines.count(0) != len(mines) - self.num_mines:
+            raise ValueError("The mine layout doesn't match the board.")
+        self._mines = mines
+        if numbers is None:
+            self._compute_numbers()
+        else:
+            self._numbers = bytearray(numbers)
+            if len(self._numbers) != len(mines):
+                raise ValueError("The numbers don't match the board.")
+
+    def _compute_numbers(self):
+        """ Compute the number of neighboring mines for every square in a single pass over the mines. """
+        self._numbers = self._geometry.count_mines(self._mines)
 
     def select(self, x, y):
         """ Select a square at the given position. If the square is unopened and doesn't have a flag on it, dig. If it's
@@ -106,79 +258,197 @@ class Minesweeper:
             neighboring squares are opened. In other cases, do nothing.
             :returns done: Whether the game has ended.
             :returns opened: The squares that were opened and what their value are.
+            :raises IndexError: If the square isn't on the board.
+        """
+        self._check_square(x, y)
+        if self._undo_log is None:
+            opened = list(self._iter_select(x, y))
+        else:
+            before, placed = self._counters(), self._mines is not None
+            opened = list(self._iter_select(x, y))
+            self._log_select(opened, before, placed)
+        result = Result(self.done, opened)
+        if self._move_listeners:
+            self._notify_move('select', x, y)
+        return result
+
+    def select_iter(self, x, y):
+        """ Select a square like `select`, but yield the squares as they are opened, in breadth-first order for
+            cascades, rather than collecting them all first. The game is updated along the way, so it's consistent
+            with the squares that have been yielded, and whether the game ended can be checked with `done` after the
+            last one. If the generator is closed before it's exhausted, the rest of the move is made without yielding
+            the remaining squares, so the game is never left halfway through a move. The move only starts when the
+            first square is requested.
+            :returns: A generator of the `OpenedSquare`s.
+            :raises IndexError: If the square isn't on the board, right away rather than when iterating.
+        """
+        self._check_square(x, y)
+        return self._stream_select(x, y)
+
+    def _stream_select(self, x, y):
+        """ Select a square, see `select_iter`. """
+        if self._undo_log is not None:
+            before, placed = self._counters(), self._mines is not None
+            opened = []
+        squares = self._iter_select(x, y)
+        try:
+            for square in squares:
+                if self._undo_log is not None:
+                    opened.append(square)
+                yield square
+        finally:
+            # Finish the move if the consumer stopped early.
+            for square in squares:
+                if self._undo_log is not None:
+                    opened.append(square)
+            if self._undo_log is not None:
+                self._log_select(opened, before, placed)
+            if self._move_listeners:
+                self._notify_move('select', x, y)
+
+    def _iter_select(self, x, y):
+        """ Select a square, see `select`.
+            :returns: A generator of the `OpenedSquare`s, which makes the move as it's consumed.
         """
         # Mines are only determined once a square is opened, to make to `first_never_mine` option possible.
         if self._mines is None:
-            self._setup_mines(safe_square=(x, y) if self.first_never_mine else None)
+            self._setup_mines(safe_square=(x, y) if self.first_never_mine or self.guess_free else None)
         # If the start time wasn't set yet, no square has been opened yet, so start the timer.
         if self._start_time is None:
             self._start_timer()
         # If the game ended, nothing happens.
         if self.done:
-            return Result(True, [])
+            return
+        state = self._state
+        i = y*self.width + x
         # The normal case, selecting an unflagged closed square.
-        elif self.state[y][x] is None or self.state[y][x] == '?':
+        if state[i] == CLOSED or state[i] == QUESTION:
             # Mine, you're dead.
-            if self._mines[y][x]:
-                self._stop_timer()
-                opened = [OpenedSquare(x, y, 'mine_hit')]
-                opened += [OpenedSquare(xi, yi, 'mine') for xi, yi in self.squares()
-                           if self._mines[yi][xi] and self.state[yi][xi] in [None, '?'] and (x, y) != (xi, yi)]
-                opened += [OpenedSquare(xi, yi, 'flag_wrong') for xi, yi in self.squares()
-                           if not self._mines[yi][xi] and self.state[yi][xi] == 'flag']
-                # Expose the opened squares on the state.
-                for x, y, v in opened:
-                    self.state[y][x] = v
-                self.done = True
-                return Result(True, opened)
-            else:
-                # A safe square, open it.
-                number = self._count_neighboring_mines(x, y)
-                self.state[y][x] = number
-                opened = [OpenedSquare(x, y, number)]
-                # If the number is 0, recursively open its neighbors if they haven't been opened or flagged yet.
-                if number == 0:
-                    opened = opened + list(chain(*[self.select(x, y)[1] for x, y in self.valid_neighbors(x, y) if self.state[y][x] is None]))
-                # Check if the game was won.
-                self.done = self.is_won()
-                if self.done:
-                    flagged = [OpenedSquare(x, y, 'flag') for x, y in self.squares() if self._mines[y][x] and self.state[y][x] != 'flag']
-                    for x, y, _ in flagged[:2]:
-                        self.flag(x, y)
-                    opened += flagged
-                    self._stop_timer()
-                return Result(self.done, opened)
-        # Flag, nothing happens.
-        elif self.state[y][x] == 'flag':
-            return Result(False, [])
+            if self._mines[i]:
+                yield from self._iter_lose(i)
+                return
+            # A safe square, open it and the area around it if it's a zero.
+            yield from self._iter_flood_fill(i)
         # If we clicked a number, see if we can auto-open neighbors when the same amount of flags have been placed
         # around this square as the number indicates.
-        elif isinstance(self.state[y][x], int):
-            # The auto-open case, where the same number of neighboring flags have been placed as the number in the
-            # square.
-            if self._count_neighboring_flags(x, y) == self.state[y][x]:
-                # Combine the results of all unmarked, closed neighbors recursively.
-                opened = list(chain(*[self.select(x, y)[1] for x, y in self.valid_neighbors(x, y) if self.state[y][x] is None]))
-                return Result(self.done, opened)
-            else:
-                # The number and the neighboring flags don't add up, do nothing.
-                return Result(False, [])
+        elif state[i] <= 8 and self._count_neighboring_flags(x, y) == state[i]:
+            # Open all unmarked, closed neighbors in order. Squares may already have been opened by the flood fill of
+            # an earlier neighbor, so the state is checked right before opening each one.
+            for j in self._geometry.neighbors(i):
+                if state[j] != CLOSED:
+                    continue
+                if self._mines[j]:
+                    # The earlier neighbors may already have won the game, in which case the mine is never opened.
+                    if self.is_won():
+                        break
+                    yield from self._iter_lose(j)
+                    return
+                yield from self._iter_flood_fill(j)
+        else:
+            # A flag, or a number where the neighboring flags don't add up, nothing happens.
+            return
+        # Check if the game was won, once for the entire move.
+        if self.is_won():
+            yield from self._iter_win()
+
+    def _iter_flood_fill(self, i):
+        """ Open the safe square at flat index `i` and, if it is a zero, iteratively open every square that can be
+            reached through zeros, in breadth-first order. Squares with a flag or question mark are not opened by the
+            flood fill.
+            :returns: A generator of the `OpenedSquare`s, every square is opened right before it's yielded.
+        """
+        state, numbers, width = self._state, self._numbers, self.width
+        offsets, indices = self._geometry.offsets, self._geometry.indices
+        state[i] = numbers[i]
+        self._opened += 1
+        yield OpenedSquare(i % width, i // width, numbers[i])
+        if numbers[i] != 0:
+            return
+        # The zeros whose neighbors still have to be opened, consumed from the front.
+        queue = [i]
+        head = 0
+        while head < len(queue):
+            j = queue[head]
+            head += 1
+            for p in range(offsets[j], offsets[j+1]):
+                k = indices[p]
+                if state[k] == CLOSED:
+                    number = numbers[k]
+                    state[k] = number
+                    # The count is kept up to date for every square, so the game is consistent at every yield.
+                    self._opened += 1
+                    if number == 0:
+                        queue.append(k)
+                    yield OpenedSquare(k % width, k // width, number)
+
+    def _iter_lose(self, i):
+        """ End the game after the mine at flat index `i` was hit, revealing all mines and wrongly placed flags.
+            :returns: A generator of the `OpenedSquare`s.
+        """
+        self._stop_timer()
+        self.done = True
+        state, mines, width = self._state, self._mines, self.width
+        state[i] = MINE_HIT
+        yield OpenedSquare(i % width, i // width, 'mine_hit')
+        for j in range(len(state)):
+            if mines[j] and (state[j] == CLOSED or state[j] == QUESTION):
+                state[j] = MINE
+                yield OpenedSquare(j % width, j // width, 'mine')
+            elif not mines[j] and state[j] == FLAG:
+                state[j] = FLAG_WRONG
+                yield OpenedSquare(j % width, j // width, 'flag_wrong')
+
+    def _iter_win(self):
+        """ End the game after it was won, placing flags on all mines that haven't been flagged yet.
+            :returns: A generator of the `OpenedSquare`s.
+        """
+        self._stop_timer()
+        self.done = True
+        self.mines_left = 0
+        state, mines, width = self._state, self._mines, self.width
+        i = mines.find(1)
+        while i != -1:
+            if state[i] != FLAG:
+                state[i] = FLAG
+                yield OpenedSquare(i % width, i // width, 'flag')
+            i = mines.find(1, i+1)
 
     def flag(self, x, y):
         """ Toggle a flag at the given position if possible, simply fail otherwise.
             :returns: True if a flag was placed or removed, False otherwise.
+            :raises IndexError: If the square isn't on the board.
         """
+        self._check_square(x, y)
+        if self._undo_log is None:
+            changed = self._flag(x, y)
+        else:
+            i = y*self.width + x
+            before, old = self._counters(), self._state[i]
+            changed = self._flag(x, y)
+            if changed:
+                if self._state[i] == QUESTION:
+                    self._questions.add(i)
+                else:
+                    self._questions.discard(i)
+                self._log([i], bytes((old,)), None, before)
+        if self._move_listeners:
+            self._notify_move('flag', x, y)
+        return changed
+
+    def _flag(self, x, y):
+        """ Toggle a flag, see `flag`. """
         # The game ended, no point in placing any flags now.
         if self.done:
             return False
+        i = y*self.width + x
         # There's no flag in an empty or '?' square, place one.
-        if self.state[y][x] is None or self.state[y][x] == '?':
+        if self._state[i] == CLOSED or self._state[i] == QUESTION:
             self.mines_left -= 1
-            self.state[y][x] = 'flag'
+            self._state[i] = FLAG
         # There is no
-        elif self.state[y][x] == 'flag':
+        elif self._state[i] == FLAG:
             self.mines_left += 1
-            self.state[y][x] = None
+            self._state[i] = CLOSED
         else:
             # In all other cases, just return False.
             return False
@@ -187,49 +457,280 @@ class Minesweeper:
     def question(self, x, y):
         """ Toggle a question mark at the given position if possible, simply fail otherwise.
             :returns: True if a question mark was placed or removed, False otherwise.
+            :raises IndexError: If the square isn't on the board.
         """
+        self._check_square(x, y)
+        if self._undo_log is None:
+            changed = self._question(x, y)
+        else:
+            i = y*self.width + x
+            before, old = self._counters(), self._state[i]
+            changed = self._question(x, y)
+            if changed:
+                if self._state[i] == QUESTION:
+                    self._questions.add(i)
+                else:
+                    self._questions.discard(i)
+                self._log([i], bytes((old,)), None, before)
+        if self._move_listeners:
+            self._notify_move('question', x, y)
+        return changed
+
+    def _question(self, x, y):
+        """ Toggle a question mark, see `question`. """
         # The game ended, no point in placing any question marks now.
         if self.done:
             return False
+        i = y*self.width + x
         # Place or remove a flag if possible.
-        if self.state[y][x] is None:
-            self.state[y][x] = '?'
-        if self.state[y][x] == 'flag':
+        if self._state[i] == CLOSED:
+            self._state[i] = QUESTION
+        elif self._state[i] == FLAG:
             self.mines_left += 1
-            self.state[y][x] = '?'
-        elif self.state[y][x] == '?':
-            self.state[y][x] = None
+            self._state[i] = QUESTION
+        elif self._state[i] == QUESTION:
+            self._state[i] = CLOSED
         else:
             # In all other cases, just return False.
             return False
         return True
 
+    def _check_square(self, x, y):
+        """ Raise an `IndexError` if a square isn't on the board. The state is stored flat, so an out of range
+            coordinate would otherwise silently wrap around to another square.
+        """
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            raise IndexError('The square ({}, {}) is not on the {}x{} board.'.format(x, y, self.width, self.height))
+
     def valid_neighbors(self, x, y):
         """ Generate all valid coordinates of the square's neighbors. """
-        # Generate all valid coordinates of the square *and* its neighbors.
-        coordinates = list(product(range(max(x-1, 0), min(x+2, self.width)), range(max(y-1, 0), min(y+2, self.height))))
-        # But we don't care about the square itself, so remove it.
-        coordinates.remove((x, y))
-        return coordinates
+        width = self.width
+        return [(j % width, j // width) for j in self._geometry.neighbors(y*width + x)]
 
     def _count_neighboring_flags(self, x, y):
         """ Count how many flags are next to the square at coordinate (x, y). """
         # Now return the number of flags.
-        return sum(self.state[y][x] == 'flag' for x, y in self.valid_neighbors(x, y))
-
-    def _count_neighboring_mines(self, x, y):
-        """ Count how many mines are next to the square at coordinate (x, y). """
-        # Now return the number of mines.
-        return sum(self._mines[y][x] for x, y in self.valid_neighbors(x, y))
+        state = self._state
+        return sum(state[j] == FLAG for j in self._geometry.neighbors(y*self.width + x))
 
     def is_won(self):
         """ Check if the current state is a winning one. """
         # A win is when every square that hasn't been opened is a mine, i.e. the number of unopened == `self.num_mines`.
-        return self.num_mines == sum([not isinstance(self.state[y][x], int) for x, y in product(range(self.width), range(self.height))])
+        if self.debug:
+            opened = sum(self._state.count(number) for number in range(9))
+            if opened != self._opened:
+                raise RuntimeError('The opened square counter ({}) does not match the state ({}).'.format(
+                    self._opened, opened))
+        return self.num_mines == len(self._state) - self._opened
 
     def squares(self):
-        """ Create a list of x, y coordinate pairs on the board. Squares are ordered column by column, row by row. """
-        return list(product(range(self.width), range(self.height)))
+        """ The x, y coordinate pairs on the board as a tuple that is shared by all games of the same size. Squares are
+            ordered column by column, row by row.
+        """
+        return self._geometry.coordinates
+
+    def undo(self):
+        """ Undo the last move, at the cost of the number of squares it changed. The timer keeps running, unless the
+            move started it, and undoing a move that ended the game resumes the timer. Undoing the first move also
+            undoes the placement of the mines. Move listeners aren't notified of undos and redos.
+            :returns: The squares that changed as a list of `OpenedSquare`s with their restored values, None if there
+                      is no move to undo.
+        """
+        if not self._undo_log:
+            return None
+        entry = self._undo_log.pop()
+        self._redo_log.append(entry)
+        indices, old, _, before, _, placed = entry
+        if placed is not None:
+            self._mines = self._numbers = None
+        return self._apply(indices, old, before)
+
+    def redo(self):
+        """ Redo the last move that was undone, see `undo`. Any new move clears the moves that can be redone.
+            :returns: The squares that changed as a list of `OpenedSquare`s with their new values, None if there is no
+                      move to redo.
+        """
+        if not self._redo_log:
+            return None
+        entry = self._redo_log.pop()
+        self._undo_log.append(entry)
+        indices, _, new, _, after, placed = entry
+        if placed is not None:
+            self._mines, self._numbers = placed
+        return self._apply(indices, new, after)
+
+    def checkpoint(self):
+        """ :returns: A checkpoint of the current position in the history, to `rollback` to later. """
+        if self._undo_log is None:
+            raise ValueError('The history is disabled.')
+        return len(self._undo_log)
+
+    def rollback(self, checkpoint):
+        """ Undo all moves since a `checkpoint`. The undone moves can be redone.
+            :returns: The squares that changed as a list of `OpenedSquare`s with their restored values.
+        """
+        if self._undo_log is None or not 0 <= checkpoint <= len(self._undo_log):
+            raise ValueError('Invalid checkpoint.')
+        changed = []
+        while len(self._undo_log) > checkpoint:
+            changed += self.undo()
+        return changed
+
+    def _counters(self):
+        """ :returns: The counters that a move can change, for the history. """
+        return self.mines_left, self.done, self._opened, self._start_time, self._final_time
+
+    def _log_select(self, opened, before, placed):
+        """ Add a select to the history.
+            :param opened: The `OpenedSquare`s of the select.
+            :param before: The counters before the select, see `_counters`.
+            :param placed: Whether the mines had been placed before the select.
+        """
+        width, questions = self.width, self._questions
+        indices = [square.y*width + square.x for square in opened]
+        # Opened squares had a question mark or nothing on them, except for wrong flags.
+        old = bytes(QUESTION if i in questions else FLAG if square.value == 'flag_wrong' else CLOSED
+                    for i, square in zip(indices, opened))
+        questions.difference_update(indices)
+        self._log(indices, old, None if placed else (self._mines, self._numbers), before)
+
+    def _log(self, indices, old, placed, before):
+        """ Add a move to the history, if it changed anything, and forget the moves that were undone. """
+        after = self._counters()
+        if indices or after != before or placed is not None:
+            state = self._state
+            self._undo_log.append((indices, old, bytes(state[i] for i in indices), before, after, placed))
+            self._redo_log.clear()
+
+    def _apply(self, indices, codes, counters):
+        """ Set the state codes of the given squares and the counters, for `undo` and `redo`. """
+        state, questions, width = self._state, self._questions, self.width
+        for i, code in zip(indices, codes):
+            state[i] = code
+            if code == QUESTION:
+                questions.add(i)
+            else:
+                questions.discard(i)
+        self.mines_left, self.done, self._opened, self._start_time, self._final_time = counters
+        # The timer may have been started, stopped or resumed.
+        self._stop_scheduler()
+        if self._listeners:
+            self._start_scheduler()
+        return [OpenedSquare(i % width, i // width, DECODE[code]) for i, code in zip(indices, codes)]
+
+    def save(self, file):
+        """ Save the game, including its timer and config, in the binary snapshot format, see `SNAPSHOT`.
+            :param file: The path to save to, or a binary file object to write to.
+        """
+        if self._final_time is not None:
+            timer, elapsed = _TIMER_STOPPED, self._final_time
+        elif self._start_time is not None:
+            timer, elapsed = _TIMER_RUNNING, self.clock.now() - self._start_time
+        else:
+            timer, elapsed = _TIMER_IDLE, 0
+        flags = 0
+        for flag, enabled in ((_SNAPSHOT_FIRST_NEVER_MINE, self.first_never_mine),
+                              (_SNAPSHOT_GUESS_FREE, self.guess_free), (_SNAPSHOT_DONE, self.done),
+                              (_SNAPSHOT_MINES, self._mines is not None)):
+            if enabled:
+                flags |= flag
+        planes = [pack_nibbles(self._state)]
+        if self._mines is not None:
+            planes += [pack_bits(self._mines), pack_nibbles(self._numbers)]
+        header = SNAPSHOT.pack(_SNAPSHOT_MAGIC, _SNAPSHOT_VERSION, _SNAPSHOT_DIFFICULTIES.index(self.difficulty), flags,
+                               timer, self.width, self.height, self.num_mines, self.mines_left, self._opened, elapsed)
+        if hasattr(file, 'write'):
+            file.write(header)
+            for plane in planes:
+                file.write(plane)
+        else:
+            with open(file, 'wb') as f:
+                f.write(header)
+                for plane in planes:
+                    f.write(plane)
+
+    def load(self, file):
+        """ Replace the game with one that was saved with `save`. The timer picks up where it was saved, and the mine
+            layouts of later games keep coming from the current generator.
+            Files are memory-mapped and only the packed planes are copied out of the mapping. Loading can't be
+            zero-copy, as the planes are bit-packed while the game keeps a byte per square, so it's dominated by
+            expanding them, which takes time linear in the number of squares.
+            :param file: The path to load from, a binary file object to read from, or a bytes-like object.
+            :raises ValueError: If it's not a valid snapshot, in which case the game is left as it was.
+        """
+        if isinstance(file, (bytes, bytearray, memoryview)):
+            self._load_snapshot(memoryview(file))
+        elif hasattr(file, 'read'):
+            self._load_snapshot(memoryview(file.read()))
+        else:
+            with open(file, 'rb') as f, mmap(f.fileno(), 0, access=ACCESS_READ) as mapped:
+                with memoryview(mapped) as view:
+                    self._load_snapshot(view)
+
+    def _load_snapshot(self, view):
+        """ Load a snapshot from a `memoryview` on it, see `load`. """
+        if len(view) < SNAPSHOT.size or view[:4] != _SNAPSHOT_MAGIC:
+            raise ValueError('Not a minesweeper snapshot.')
+        magic, version, difficulty, flags, timer, width, height, num_mines, mines_left, opened, elapsed = \
+            SNAPSHOT.unpack_from(view)
+        if version != _SNAPSHOT_VERSION:
+            raise ValueError('Unsupported snapshot version {}.'.format(version))
+        if difficulty >= len(_SNAPSHOT_DIFFICULTIES):
+            raise ValueError('Unknown difficulty {} in the snapshot.'.format(difficulty))
+        difficulty = _SNAPSHOT_DIFFICULTIES[difficulty]
+        if board_size(difficulty, width, height, num_mines) != (width, height, num_mines):
+            raise ValueError("The snapshot's board doesn't match its difficulty.")
+        size = width*height
+        sizes = [(size + 1) >> 1]
+        if flags & _SNAPSHOT_MINES:
+            sizes += [(size + 7) >> 3, (size + 1) >> 1]
+        if len(view) != SNAPSHOT.size + sum(sizes):
+            raise ValueError('The snapshot is truncated.')
+        # The packed planes are copied out of the view, as they can only be expanded from `bytes`.
+        planes = []
+        offset = SNAPSHOT.size
+        for plane_size in sizes:
+            planes.append(view[offset:offset + plane_size].tobytes())
+            offset += plane_size
+        # Check the planes before anything is changed. The checks run on the packed planes, where translating every
+        # byte to a bit per nibble lets them be counted as the set bits of one big integer. The padding nibble of an odd
+        # sized board is a 0, which counts as an opened square.
+        if planes[0].translate(_INVALID_STATE).find(1) != -1:
+            raise ValueError('The snapshot has invalid state codes.')
+        if opened != int.from_bytes(planes[0].translate(_OPENED_NIBBLES), 'little').bit_count() - (size & 1):
+            raise ValueError("The snapshot's number of opened squares doesn't match its state.")
+        if flags & _SNAPSHOT_MINES:
+            if int.from_bytes(planes[1], 'little').bit_count() != num_mines:
+                raise ValueError("The snapshot's number of mines doesn't match its mines.")
+            if planes[2].translate(_INVALID_NUMBERS).find(1) != -1:
+                raise ValueError('The snapshot has invalid numbers.')
+        elif opened:
+            raise ValueError('The snapshot has opened squares, but no mines.')
+        if difficulty == 'custom':
+            self.set_config(difficulty, width, height, num_mines)
+        else:
+            self.set_config(difficulty)
+        self.set_config(first_never_mine=bool(flags & _SNAPSHOT_FIRST_NEVER_MINE),
+                        guess_free=bool(flags & _SNAPSHOT_GUESS_FREE))
+        # Fill the state in place, as `state` is a view on it.
+        self._state[:] = unpack_nibbles(planes[0], size)
+        if flags & _SNAPSHOT_MINES:
+            self._mines = unpack_bits(planes[1], size)
+            self._numbers = unpack_nibbles(planes[2], size)
+        self.done = bool(flags & _SNAPSHOT_DONE)
+        self.mines_left = mines_left
+        self._opened = opened
+        if timer != _TIMER_IDLE:
+            self._start_time = self.clock.now() - elapsed
+            if timer == _TIMER_STOPPED:
+                self._final_time = int(elapsed)
+            elif self._listeners:
+                self._start_scheduler()
+        if self._undo_log is not None:
+            i = self._state.find(QUESTION)
+            while i != -1:
+                self._questions.add(i)
+                i = self._state.find(QUESTION, i+1)
 
     #
     # From here on, the code deal with the timer and updates.
@@ -240,7 +741,23 @@ class Minesweeper:
             return self._final_time
         if self._start_time is None:
             return 0
-        return int(time.time() - self._start_time)
+        return int(self.clock.now() - self._start_time)
+
+    def add_move_listener(self, listener):
+        """ Add a listener to be called after every move, e.g. to record the game.
+            :param listener: The listener, which is called as `listener(action, x, y)`, where the action is one of
+                             `ACTIONS`, or 'reset' right before the game is reset, in which case `x` and `y` are None.
+        """
+        self._move_listeners.append(listener)
+
+    def remove_move_listener(self, listener):
+        """ Remove a previously added move listener. """
+        self._move_listeners.remove(listener)
+
+    def _notify_move(self, action, x, y):
+        """ Update all move listeners about a move. """
+        for listener in self._move_listeners:
+            listener(action, x, y)
 
     def add_listener(self, listener):
         """ Add a listener to be called when the timer is updated.
@@ -253,7 +770,7 @@ class Minesweeper:
             
     def _start_timer(self):
         """ Start the timer. """
-        self._start_time = time.time()
+        self._start_time = self.clock.now()
         # Start the scheduler if we have listeners.
         if self._listeners:
             self._start_scheduler()
@@ -265,13 +782,13 @@ class Minesweeper:
 
     def _start_scheduler(self):
         """ Start the scheduler that will notify listeners of timer changes. """
-        if self._start_time is not None:
-            t_diff = time.time() - self._start_time
+        # A tick that was already running when the timer stopped, mustn't schedule the next one.
+        if self._start_time is not None and self._final_time is None:
+            t_diff = self.clock.now() - self._start_time
             t_wait = ceil(t_diff) - t_diff
             if t_wait == 0:
                 t_wait = 1
-            self._scheduler = Timer(t_wait, self._notify)
-            self._scheduler.start()
+            self._scheduler = self.clock.call_later(t_wait, self._notify)
 
     def _stop_scheduler(self):
         """ Stop the scheduler that notified listeners of timer changes. """
@@ -281,7 +798,7 @@ class Minesweeper:
 
     def remove_listener(self, listener):
         """ Remove a previously added timer listener. """ 
-        self.listeners.remove(listener)
+        self._listeners.remove(listener)
         if not self._listeners:
             self._stop_scheduler()
 
@@ -299,3 +816,118 @@ class Minesweeper:
 Result = namedtuple('Result', 'done, opened')
 # A tuple to represent an opened square and its value.
 OpenedSquare = namedtuple('OpenedSquare', 'x, y, value')
+# The header of the binary snapshot format of `Minesweeper.save`: the magic, the format version, the difficulty as an
+# index into `_SNAPSHOT_DIFFICULTIES`, the `_SNAPSHOT_*` flags, the timer's `_TIMER_*` state, the width, the height,
+# the number of mines, the number of mines left, the number of opened squares and the timer's time in seconds.
+# The header is followed by the planes, all flat and row-major: the state codes at 4 bits per square, and if the mines
+# have been placed, the mines at 1 bit per square and the numbers at 4 bits per square.
+SNAPSHOT = Struct('<4sBBBBIIIiId')
+_SNAPSHOT_MAGIC = b'MSWP'
+_SNAPSHOT_VERSION = 1
+_SNAPSHOT_DIFFICULTIES = ('beginner', 'intermediate', 'expert', 'custom')
+_SNAPSHOT_FIRST_NEVER_MINE = 1
+_SNAPSHOT_GUESS_FREE = 2
+_SNAPSHOT_DONE = 4
+_SNAPSHOT_MINES = 8
+# Translate a byte of a packed nibble plane to 1 if either of its codes is invalid, for the state and numbers planes.
+_INVALID_STATE = bytes((b & 0xf) > FLAG_WRONG or b >> 4 > FLAG_WRONG for b in range(256))
+_INVALID_NUMBERS = bytes((b & 0xf) > 8 or b >> 4 > 8 for b in range(256))
+# Translate a byte of the packed state plane to a bit per opened square, i.e. per code up to 8.
+_OPENED_NIBBLES = bytes(((b & 0xf) <= 8) | (b >> 4 <= 8) << 1 for b in range(256))
+_TIMER_IDLE = 0
+_TIMER_RUNNING = 1
+_TIMER_STOPPED = 2
+
+# A tuple to represent a move.
+# :param action: What to do, one of `ACTIONS`.
+# :param x: The x coordinate of the square.
+# :param y: The y coordinate of the square.
+Move = namedtuple('Move', 'action, x, y')
+
+# The binary wire protocol. Moves are fixed-width records: the action as an index into `ACTIONS`, followed by the x and
+# y coordinates as little-endian unsigned shorts.
+ACTIONS = ('select', 'flag', 'question')
+MOVE = Struct('<BHH')
+
+
+def encode_move(action, x, y):
+    """ :returns: The move as a `MOVE` record. """
+    return MOVE.pack(ACTIONS.index(action), x, y)
+
+
+def decode_moves(data):
+    """ :returns: A list of the `Move`s in a bytes-like object of concatenated `MOVE` records. """
+    return [Move(ACTIONS[action], x, y) for action, x, y in MOVE.iter_unpack(data)]
+
+
+def encode_result(result, width):
+    """ Encode a `Result` for the wire. The opened squares are sorted by their flat index and split into runs of
+        consecutive squares, which is what a flood fill mostly opens. The encoding is a byte for `done`, followed by
+        the number of runs, and for every run the gap since the end of the previous run and its length as varints,
+        followed by the state codes of its squares, two 4-bit codes per byte with the low nibble first.
+        The order of the opened squares isn't kept, `decode_result` returns them sorted by their flat index.
+        :param width: The width of the board, to compute the flat indices with.
+        :returns: The encoded result as `bytes`.
+    """
+    codes = {y*width + x: ENCODE[value] for x, y, value in result.opened}
+    if len(codes) != len(result.opened):
+        raise ValueError('A square was opened more than once.')
+    indices = sorted(codes)
+    data = bytearray((1 if result.done else 0,))
+    runs = bytearray()
+    num_runs = end = start = 0
+    for k in range(1, len(indices) + 1):
+        if k == len(indices) or indices[k] != indices[k-1] + 1:
+            num_runs += 1
+            _write_varint(runs, indices[start] - end)
+            _write_varint(runs, k - start)
+            end = indices[k-1] + 1
+            runs += pack_nibbles(bytes(map(codes.__getitem__, range(indices[start], end))))
+            start = k
+    _write_varint(data, num_runs)
+    return bytes(data + runs)
+
+
+def decode_result(data, width):
+    """ Decode a result that was encoded with `encode_result`.
+        :param width: The width of the board.
+        :returns: A `Result`, with the opened squares sorted by their flat index.
+    """
+    data = bytes(data)
+    done = bool(data[0])
+    num_runs, pos = _read_varint(data, 1)
+    opened = []
+    end = 0
+    for _ in range(num_runs):
+        gap, pos = _read_varint(data, pos)
+        length, pos = _read_varint(data, pos)
+        i = end + gap
+        end = i + length
+        packed = data[pos:pos + ((length + 1) >> 1)]
+        pos += len(packed)
+        opened += map(OpenedSquare, map(int.__mod__, range(i, end), repeat(width)),
+                      map(int.__floordiv__, range(i, end), repeat(width)),
+                      map(DECODE.__getitem__, unpack_nibbles(packed, length)))
+    return Result(done, opened)
+
+
+def _write_varint(data, n):
+    """ Append an unsigned integer to a `bytearray` as a LEB128 varint, 7 bits per byte. """
+    while n > 0x7f:
+        data.append(n & 0x7f | 0x80)
+        n >>= 7
+    data.append(n)
+
+
+def _read_varint(data, pos):
+    """ Read a LEB128 varint at the given position.
+        :returns: The integer and the position after it.
+    """
+    n = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        n |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return n, pos
+        shift += 7
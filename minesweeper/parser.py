@@ -1,26 +1,85 @@
 """ The argument parser, defining the commandline arguments that can be passed.
     The parser simply sets up and parses the args with `argparse.ArgumentParser`.
 """
-from argparse import ArgumentParser
+from argparse import SUPPRESS, Action, ArgumentParser
 
 
-def parse_args():
-    """ Parse `sys.argv`. """
+def parse_args(args=None):
+    """ Parse `sys.argv`, or the given list of arguments. The `command` of the result is None when the game should be
+        played, otherwise it's the name of the subcommand that was given.
+    """
     parser = ArgumentParser(description='The classical Minesweeper game.')
     parser.add_argument('--debug', action='store_true', dest='debug_mode', help='Add a debug menu to export the state '
                                                                                 'and ground truth of the game.')
-    # Allow the setting of the difficulty
-    group = parser.add_mutually_exclusive_group(required=False)
-    group.set_defaults(difficulty='expert')
-    group.add_argument('--beginner', action='store_const', const='beginner', dest='difficulty')
-    group.add_argument('--intermediate', action='store_const', const='intermediate', dest='difficulty')
-    group.add_argument('--expert', action='store_const', const='expert', dest='difficulty', default='expert')
-    group.add_argument('--custom', nargs=3, dest='dims', metavar=('width', 'height', 'num_mines'))
+    parser.add_argument('--headless', action='store_true', help='Play in the terminal instead of the GUI, without '
+                                                                'loading Qt.')
+    add_board_arguments(parser)
+    # The board options can also be given after a subcommand. They have no defaults there, so they only override the
+    # options given before the subcommand when they're given.
+    board = ArgumentParser(add_help=False)
+    add_board_arguments(board, defaults=False)
+    subparsers = parser.add_subparsers(dest='command', metavar='command')
+    # Headless simulations.
+    simulate = subparsers.add_parser('simulate', parents=[board], help='Play many headless games across all cores and report '
+                                                      'statistics.')
+    simulate.add_argument('--games', type=int, default=10000, help='The number of games to play.')
+    simulate.add_argument('--workers', type=int, help='The number of worker processes, defaults to the number of '
+                                                      'cores.')
+    simulate.add_argument('--policy', help="The move policy as 'module:function', defaults to random moves.")
+    simulate.add_argument('--chunk-size', type=int, default=100, help='The number of games per task.')
+    simulate.add_argument('--max-moves', type=int, help='The maximum number of moves per game.')
+    # The game server.
+    serve = subparsers.add_parser('serve', parents=[board], help='Host many games for clients over TCP or a Unix socket.')
+    serve.add_argument('--host', default='127.0.0.1', help='The address to listen on.')
+    serve.add_argument('--port', type=int, default=8765, help='The TCP port to listen on.')
+    serve.add_argument('--unix', metavar='PATH', help='Listen on a Unix socket at the given path instead of TCP.')
+    serve.add_argument('--max-sessions', type=int, default=100000, help='The maximum number of concurrent sessions.')
+    serve.add_argument('--max-squares', type=int, default=10000, help='The maximum number of squares of the boards '
+                                                                      'that clients may ask for.')
+    # Replay verification.
+    verify = subparsers.add_parser('verify-replays', help='Re-execute replay files across all cores and report the '
+                                                          'replays that fail the integrity checks.')
+    verify.add_argument('paths', nargs='+', metavar='path', help='A replay file, or a directory to search for them.')
+    verify.add_argument('--workers', type=int, help='The number of worker processes, defaults to the number of cores.')
+    verify.add_argument('--chunk-size', type=int, default=64, help='The number of files per task.')
+    verify.add_argument('--min-move-ms', type=int, default=0, help='The minimum plausible time between two moves, in '
+                                                                   'milliseconds.')
+    verify.add_argument('--suffix', default='.replay', help='The suffix of the replay files in directories.')
+    verify.add_argument('--max-squares', type=int, default=1000000, help='The maximum number of squares of the boards '
+                                                                         'of the replays.')
 
-    args = parser.parse_args()
+    args = parser.parse_args(args)
     # Shift arguments around a bit to be more easily usable.
     if args.dims is not None:
         args.difficulty = 'custom'
         args.width, args.height, args.num_mines = args.dims
     del args.dims
     return args
+
+
+def add_board_arguments(parser, defaults=True):
+    """ Add the seed and the mutually exclusive difficulty arguments to a parser.
+        :param defaults: Whether to set the defaults, otherwise arguments that aren't given are left out of the result.
+    """
+    default = None if defaults else SUPPRESS
+    parser.add_argument('--seed', type=int, default=default, help='The seed for the mine layouts, so a sequence of '
+                                                                  'games can be reproduced.')
+    # Allow the setting of the difficulty
+    group = parser.add_mutually_exclusive_group(required=False)
+    if defaults:
+        group.set_defaults(difficulty='expert', dims=None)
+    group.add_argument('--beginner', action=_Preset, const='beginner', dest='difficulty', default=SUPPRESS)
+    group.add_argument('--intermediate', action=_Preset, const='intermediate', dest='difficulty', default=SUPPRESS)
+    group.add_argument('--expert', action=_Preset, const='expert', dest='difficulty', default=SUPPRESS)
+    group.add_argument('--custom', nargs=3, type=int, dest='dims', metavar=('width', 'height', 'num_mines'),
+                       default=SUPPRESS)
+
+
+class _Preset(Action):
+    """ Select a preset difficulty, dropping custom dimensions that were given earlier, e.g. before a subcommand. """
+    def __init__(self, option_strings, dest, const, **kwargs):
+        super().__init__(option_strings, dest, nargs=0, const=const, **kwargs)
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        setattr(namespace, self.dest, self.const)
+        namespace.dims = None
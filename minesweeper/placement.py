@@ -0,0 +1,50 @@
+""" Mine placement. Mines are sampled directly as flat square indices, without materializing a list of every square on
+    the board, so placement costs O(num_mines) time and memory, rather than O(width*height).
+"""
+import random
+
+
+def place_mines(size, num_mines, safe=None, rng=None):
+    """ Uniformly place mines on a board, never on the safe square. For sparse boards the mines are sampled with
+        Floyd's algorithm. When more than half of the squares hold a mine, the free squares are sampled instead and the
+        mines are placed everywhere else, so the number of random draws is always at most half the number of squares.
+        :param size: The number of squares on the board.
+        :param num_mines: The number of mines to place.
+        :param safe: The flat index of the square that should remain free from mines, None if there is no such square.
+        :param rng: The `random.Random` instance to draw from, None to use the global `random` functions.
+        :returns: A `bytearray` of length `size`, where 1 marks where mines are located.
+    """
+    # Sample from all squares but the last one if there's a safe square, the safe square is then swapped with the last.
+    population = size if safe is None else size - 1
+    if not 0 <= num_mines <= population:
+        raise ValueError("The number of mines doesn't fit on the board.")
+    getrandbits = (rng or random).getrandbits
+    if num_mines <= population // 2:
+        mines = bytearray(size)
+        for i in _floyd_sample(population, num_mines, getrandbits):
+            mines[i] = 1
+    else:
+        mines = bytearray(b'\x01') * population + bytearray(size - population)
+        for i in _floyd_sample(population, population - num_mines, getrandbits):
+            mines[i] = 0
+    if safe is not None and mines[safe]:
+        mines[safe] = 0
+        mines[population] = 1
+    return mines
+
+
+def _floyd_sample(n, k, getrandbits):
+    """ Robert Floyd's algorithm to sample `k` distinct integers from `range(n)` uniformly, in O(k) time and memory.
+        :returns: The sampled integers as a set.
+    """
+    chosen = set()
+    for j in range(n - k, n):
+        # Draw uniformly from range(j + 1) by rejection sampling, like `random.randrange` does, but without its
+        # argument checking overhead.
+        bound = j + 1
+        bits = bound.bit_length()
+        t = getrandbits(bits)
+        while t >= bound:
+            t = getrandbits(bits)
+        chosen.add(j if t in chosen else t)
+    return chosen
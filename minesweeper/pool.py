@@ -0,0 +1,209 @@
+""" A pool of pre-generated boards, so the first `select` of a game doesn't have to pay for placing the mines. This
+    matters most for guess-free boards, which can take a large number of attempts to generate.
+
+    Boards are kept per (width, height, num_mines, policy) key, where the policy describes what the first click needs:
+    - 'none': The first click may hit a mine, any board will do.
+    - 'safe': The first click never hits a mine. Boards are drawn without a safe square, and when the first click turns
+      out to hold a mine, that mine is moved to a random square without one. This keeps the layouts uniformly drawn
+      among those without a mine on the first click, just like `place_mines` with a safe square, so every board fits.
+    - 'guess_free': The board can be solved without guessing from the first click. Boards are generated for a random
+      start square, and they fit any first click that opens the same area as that start square, i.e. any zero in it.
+      When no pooled board fits, the game generates its own board.
+
+    A daemon thread keeps every key that has been asked for topped up to the pool's capacity. Only the keys that were
+    used most recently are kept, to bound the memory use when the board size changes a lot.
+"""
+from collections import OrderedDict, deque
+from random import Random
+from threading import Condition, Thread
+
+from .geometry import Geometry
+from .placement import place_mines
+from .seeding import SeedSequence
+
+POLICIES = ('none', 'safe', 'guess_free')
+
+
+class BoardPool:
+    """ A bounded pool of pre-generated boards that a background thread refills. A single pool can be shared by any
+        number of games, see the `pool` parameter of `Minesweeper`.
+
+        Attributes:
+        _boards             An `OrderedDict` that maps each key to a `deque` of (mines, numbers, fits) tuples, in least
+                            recently used order. `fits` is None if the board fits every first click, otherwise a flat
+                            `bytearray` where 1 marks the first clicks that it fits.
+        _closed             Whether the pool has been closed.
+        _condition          The `Condition` that guards the pool's state and wakes up the refill thread.
+        _rng                The `random.Random` instance that the boards are drawn from.
+        _thread             The refill thread, None if it hasn't been started yet.
+        capacity            The maximum number of boards to keep per key.
+        guess_free_timeout  The maximum time to spend on generating a single guess-free board, in seconds.
+        hits                The number of boards that were taken from the pool.
+        max_keys            The maximum number of keys to keep boards for.
+        misses              The number of times no fitting board was ready.
+    """
+    def __init__(self, capacity=8, max_keys=4, seed=None, guess_free_timeout=5):
+        """ :param seed: The seed for the boards as an integer or a `SeedSequence`, None for a random seed. """
+        if capacity < 1 or max_keys < 1:
+            raise ValueError('The capacity and the number of keys must be at least 1.')
+        if not isinstance(seed, SeedSequence):
+            seed = SeedSequence(seed)
+        self.capacity = capacity
+        self.max_keys = max_keys
+        self.guess_free_timeout = guess_free_timeout
+        self.hits = 0
+        self.misses = 0
+        self._rng = Random(seed.generate_seed())
+        self._boards = OrderedDict()
+        self._condition = Condition()
+        self._closed = False
+        self._thread = None
+
+    @property
+    def hit_rate(self):
+        requests = self.hits + self.misses
+        return self.hits / requests if requests else 0.0
+
+    def ready(self, width, height, num_mines, policy):
+        """ :returns: The number of boards that are ready for the given key. """
+        with self._condition:
+            boards = self._boards.get((width, height, num_mines, policy))
+            return len(boards) if boards is not None else 0
+
+    def prefill(self, width, height, num_mines, policy):
+        """ Start generating boards for the given key, so they're ready by the time a game asks for one. """
+        with self._condition:
+            self._use((width, height, num_mines, policy))
+
+    def take(self, width, height, num_mines, policy, square=None):
+        """ Take a board that fits the first click from the pool. Taking a board for a key that the pool doesn't have
+            boards for yet, starts generating boards for it.
+            :param policy: What the first click needs, one of `POLICIES`.
+            :param square: The (x, y) square of the first click, only needed for the 'safe' and 'guess_free' policies.
+            :returns: A (mines, numbers) tuple of flat `bytearray`s, see `Minesweeper.set_mines`, None if no fitting
+                      board was ready or the pool has been closed.
+        """
+        if policy not in POLICIES:
+            raise ValueError('The policy must be one of {}.'.format(', '.join(POLICIES)))
+        if policy != 'none' and square is None:
+            raise ValueError("The first click is needed for the '{}' policy.".format(policy))
+        with self._condition:
+            # A game may outlive the pool it was given, it then generates its own boards.
+            if self._closed:
+                self.misses += 1
+                return None
+            boards = self._use((width, height, num_mines, policy))
+            i = None if square is None else square[1]*width + square[0]
+            for board in boards:
+                if board[2] is None or board[2][i]:
+                    boards.remove(board)
+                    self._condition.notify()
+                    break
+            else:
+                self.misses += 1
+                return None
+            self.hits += 1
+            mines, numbers, _ = board
+            if policy == 'safe' and mines[i]:
+                self._move_mine(Geometry.of(width, height), mines, numbers, i)
+        return mines, numbers
+
+    def close(self):
+        """ Stop the refill thread and drop all boards. """
+        with self._condition:
+            self._closed = True
+            self._boards.clear()
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _use(self, key):
+        """ Mark a key as the most recently used one, adding it if it's new, and evict the least recently used keys.
+            The condition's lock must be held.
+            :returns: The `deque` of boards for the key.
+        """
+        boards = self._boards.get(key)
+        if boards is None:
+            if self._closed:
+                raise ValueError('The pool has been closed.')
+            boards = self._boards[key] = deque()
+            while len(self._boards) > self.max_keys:
+                self._boards.popitem(last=False)
+            if self._thread is None:
+                self._thread = Thread(target=self._refill, name='BoardPool', daemon=True)
+                self._thread.start()
+            self._condition.notify()
+        else:
+            self._boards.move_to_end(key)
+        return boards
+
+    def _next_key(self):
+        """ :returns: The most recently used key that isn't full, None if all of them are. The condition's lock must be
+                      held.
+        """
+        for key in reversed(self._boards):
+            if len(self._boards[key]) < self.capacity:
+                return key
+        return None
+
+    def _refill(self):
+        """ The refill thread, which generates boards until the pool is closed. """
+        while True:
+            with self._condition:
+                key = self._next_key()
+                while key is None and not self._closed:
+                    self._condition.wait()
+                    key = self._next_key()
+                if self._closed:
+                    return
+            # Boards are generated without holding the lock, so games can keep taking boards in the meantime.
+            board = self._generate(*key)
+            with self._condition:
+                boards = self._boards.get(key)
+                # The key may have been evicted while the board was being generated.
+                if board is not None and boards is not None and len(boards) < self.capacity:
+                    boards.append(board)
+
+    def _generate(self, width, height, num_mines, policy):
+        """ Generate a board for the given key.
+            :returns: A (mines, numbers, fits) tuple, see `_boards`, None if a guess-free board couldn't be generated in
+                      time.
+        """
+        geometry = Geometry.of(width, height)
+        if policy != 'guess_free':
+            mines = place_mines(geometry.size, num_mines, rng=self._rng)
+            return mines, geometry.count_mines(mines), None
+        # Imported here, so the solver is only loaded when it's used.
+        from .solver.guess_free import generate_guess_free
+        start = self._rng.randrange(width), self._rng.randrange(height)
+        mines = generate_guess_free(width, height, num_mines, start, self._rng, self.guess_free_timeout)
+        if mines is None:
+            return None
+        numbers = geometry.count_mines(mines)
+        # The first clicks that fit are the zeros that the start square's flood fill reaches.
+        fits = bytearray(geometry.size)
+        start = start[1]*width + start[0]
+        fits[start] = 1
+        queue = [start]
+        for i in queue:
+            for j in geometry.neighbors(i):
+                if not fits[j] and numbers[j] == 0:
+                    fits[j] = 1
+                    queue.append(j)
+        return mines, numbers, fits
+
+    def _move_mine(self, geometry, mines, numbers, i):
+        """ Move the mine on the square at flat index `i` to a random square without a mine, updating the numbers. The
+            square is found by rejection sampling, which takes `len(mines) / free squares` draws on average, rather
+            than listing every free square.
+        """
+        randrange = self._rng.randrange
+        j = randrange(len(mines))
+        while mines[j]:
+            j = randrange(len(mines))
+        mines[i], mines[j] = 0, 1
+        for k in geometry.neighbors(i):
+            numbers[k] -= 1
+        for k in geometry.neighbors(j):
+            numbers[k] += 1
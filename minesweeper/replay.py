@@ -0,0 +1,268 @@
+""" Recording and playback of games. A `Recorder` listens to the moves of a game and appends a replay to a file for
+    every game that's played, and `play` reconstructs a game from a replay without any GUI or threads.
+
+    Replays hold the exact mine layout rather than how it was generated, so they stay valid when the way mine layouts are
+    drawn changes. A replay file is a plain concatenation of replays, each made up of:
+    - A `REPLAY` header with the board, the outcome and the number of moves.
+    - The mines at 1 bit per square, flat and row-major, see `board.pack_bits`.
+    - The moves as `MOVE_RECORD`s: the action as an index into `ACTIONS`, the x and y coordinates, and the time of the
+      move in milliseconds since the first move.
+"""
+from collections import namedtuple
+import os
+import stat
+from struct import Struct
+
+from .board import pack_bits, unpack_bits
+from .clock import VirtualClock
+from .minesweeper import ACTIONS, Minesweeper
+
+# The header of a replay: the magic, the format version, the `_REPLAY_*` flags, the width, the height, the number of
+# mines, the seed of the game's mine layouts (0 if it wasn't seeded), the final time on the timer and the number of
+# moves.
+REPLAY = Struct('<4sBBIIIQII')
+# A move in a replay: the action, the x and y coordinates, and the time in milliseconds since the first move.
+MOVE_RECORD = Struct('<BHHI')
+_REPLAY_MAGIC = b'MSRP'
+_REPLAY_VERSION = 1
+_REPLAY_FIRST_NEVER_MINE = 1
+_REPLAY_DONE = 2
+_REPLAY_WON = 4
+_REPLAY_SEEDED = 8
+_REPLAY_MINES = 16
+
+# A tuple to store a replay in.
+# :param width: The width of the board.
+# :param height: The height of the board.
+# :param num_mines: The number of mines.
+# :param first_never_mine: Whether the first click could hit a mine.
+# :param seed: The seed of the game's mine layouts, None if it wasn't seeded.
+# :param mines: The mines as a flat `bytearray`, see `Minesweeper.set_mines`, None if they were never placed.
+# :param moves: The moves as a list of (action, x, y, milliseconds) tuples.
+# :param done: Whether the game ended.
+# :param won: Whether the game was won.
+# :param final_time: The time on the timer when the recording ended.
+Replay = namedtuple('Replay', 'width, height, num_mines, first_never_mine, seed, mines, moves, done, won, final_time')
+
+
+def encode_replay(replay):
+    """ :returns: The `Replay` in the binary replay format, as `bytes`. """
+    flags = 0
+    for flag, enabled in ((_REPLAY_FIRST_NEVER_MINE, replay.first_never_mine), (_REPLAY_DONE, replay.done),
+                          (_REPLAY_WON, replay.won), (_REPLAY_SEEDED, replay.seed is not None),
+                          (_REPLAY_MINES, replay.mines is not None)):
+        if enabled:
+            flags |= flag
+    data = bytearray(REPLAY.pack(_REPLAY_MAGIC, _REPLAY_VERSION, flags, replay.width, replay.height, replay.num_mines,
+                                 replay.seed or 0, replay.final_time, len(replay.moves)))
+    data += pack_bits(replay.mines if replay.mines is not None else bytes(replay.width*replay.height))
+    for action, x, y, milliseconds in replay.moves:
+        data += MOVE_RECORD.pack(ACTIONS.index(action), x, y, milliseconds)
+    return bytes(data)
+
+
+def iter_replays(file, max_squares=1000000, max_moves=1000000):
+    """ Read the replays in a replay file one by one. The sizes in the headers are checked before anything is read, so a
+        forged header raises a `ValueError` rather than making the reader allocate a huge buffer.
+        :param file: The path of the replay file, or a binary file object to read from.
+        :param max_squares: The maximum number of squares of a replay's board.
+        :param max_moves: The maximum number of moves of a replay.
+        :returns: A generator of `Replay`s.
+        :raises ValueError: If the file isn't a valid replay file, or a replay is larger than the limits.
+    """
+    if not hasattr(file, 'read'):
+        with open(file, 'rb') as f:
+            yield from iter_replays(f, max_squares, max_moves)
+        return
+    while True:
+        header = file.read(REPLAY.size)
+        if not header:
+            return
+        if len(header) < REPLAY.size:
+            raise ValueError('The replay file is truncated.')
+        magic, version, flags, width, height, num_mines, seed, final_time, num_moves = REPLAY.unpack(header)
+        if magic != _REPLAY_MAGIC:
+            raise ValueError('Not a minesweeper replay.')
+        if version != _REPLAY_VERSION:
+            raise ValueError('Unsupported replay version {}.'.format(version))
+        size = width*height
+        if size > max_squares:
+            raise ValueError('The board of the replay has more than {} squares.'.format(max_squares))
+        if num_moves > max_moves:
+            raise ValueError('The replay has more than {} moves.'.format(max_moves))
+        mines_size, moves_size = (size + 7) >> 3, num_moves*MOVE_RECORD.size
+        remaining = _remaining(file)
+        if remaining is not None and remaining < mines_size + moves_size:
+            raise ValueError('The replay file is truncated.')
+        data = file.read(mines_size + moves_size)
+        if len(data) < mines_size + moves_size:
+            raise ValueError('The replay file is truncated.')
+        moves = [(ACTIONS[action], x, y, milliseconds)
+                 for action, x, y, milliseconds in MOVE_RECORD.iter_unpack(data[mines_size:])]
+        yield Replay(width, height, num_mines, bool(flags & _REPLAY_FIRST_NEVER_MINE),
+                     seed if flags & _REPLAY_SEEDED else None,
+                     unpack_bits(data[:mines_size], size) if flags & _REPLAY_MINES else None, moves,
+                     bool(flags & _REPLAY_DONE), bool(flags & _REPLAY_WON), final_time)
+
+
+def _remaining(file):
+    """ :returns: The number of bytes left in a file, None if it's not a regular file with a known size. """
+    try:
+        status = os.fstat(file.fileno())
+        return status.st_size - file.tell() if stat.S_ISREG(status.st_mode) else None
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def play(replay, game=None):
+    """ Reconstruct a game by replaying its moves on its mine layout. The game runs on a `VirtualClock`, which is moved
+        forward to the time of every move, so the timer ends up the same as in the original game.
+        :param game: A `Minesweeper` game on a `VirtualClock` to replay on, which saves setting one up when playing many
+                     replays, None to create a new game.
+        :returns: The game, as it was when the recording ended.
+    """
+    game = _setup(replay, game)
+    for _ in _replay_moves(replay, game):
+        pass
+    return game
+
+
+def check(replay, game=None, min_move_ms=0, max_squares=1000000):
+    """ Check a replay for integrity, e.g. before it's accepted on a leaderboard, by re-executing it. The checks are:
+        - 'layout': The mine layout matches the board, and doesn't have a mine under the first click if the first click
+          is meant to be safe. The board has at most `max_squares` squares, which is checked before a game is set up,
+          so a forged header can't make the game allocate a huge board.
+        - 'illegal move': Every move is on the board, and no moves are made after the game ended.
+        - 'timing': The moves are in chronological order and at least `min_move_ms` milliseconds apart, and the final
+          time matches the time of the moves. The final time may be off by a second, as moves are recorded with
+          millisecond precision.
+        - 'outcome': Replaying the moves leads to the recorded outcome.
+        :param game: See `play`.
+        :param max_squares: The maximum number of squares of the board.
+        :returns: The name of the first check that failed, None if the replay passed all of them.
+    """
+    width, height = replay.width, replay.height
+    mines = replay.mines
+    if width*height == 0 or width*height > max_squares or replay.num_mines >= width*height:
+        return 'layout'
+    if mines is not None and (len(mines) != width*height or mines.count(1) != replay.num_mines):
+        return 'layout'
+    previous = None
+    first_select = None
+    for action, x, y, milliseconds in replay.moves:
+        if x >= width or y >= height:
+            return 'illegal move'
+        if previous is not None and (milliseconds < previous or milliseconds - previous < min_move_ms):
+            return 'timing'
+        previous = milliseconds
+        if first_select is None and action == 'select':
+            first_select = y*width + x
+    if first_select is not None and (mines is None or replay.first_never_mine and mines[first_select]):
+        return 'layout'
+    game = _setup(replay, game)
+    for k, _ in enumerate(_replay_moves(replay, game)):
+        if game.done and k != len(replay.moves) - 1:
+            return 'illegal move'
+    if game.done != replay.done or (game.done and game.is_won()) != replay.won:
+        return 'outcome'
+    if abs(game.time() - replay.final_time) > 1:
+        return 'timing'
+    return None
+
+
+def verify(replay, game=None):
+    """ Check that replaying a replay leads to the outcome that was recorded, see `check`.
+        :param game: See `play`.
+        :returns: True if the replay passed all checks.
+    """
+    return check(replay, game) is None
+
+
+def _setup(replay, game):
+    """ Set up a game for a replay, see `play`. """
+    if game is None:
+        game = Minesweeper(seed=0, clock=VirtualClock())
+    game.set_config('custom', replay.width, replay.height, replay.num_mines, replay.first_never_mine)
+    if replay.mines is not None:
+        game.set_mines(replay.mines)
+    return game
+
+
+def _replay_moves(replay, game):
+    """ Make the moves of a replay on a game that was set up with `_setup`, yielding after every move. """
+    clock = game.clock
+    start = clock.now()
+    for action, x, y, milliseconds in replay.moves:
+        clock.advance(max(start + milliseconds / 1000 - clock.now(), 0))
+        if action == 'select':
+            game.select(x, y)
+        elif action == 'flag':
+            game.flag(x, y)
+        else:
+            game.question(x, y)
+        yield
+
+
+class Recorder:
+    """ Records the games that are played on a `Minesweeper` instance to a replay file. Every game is written as soon as
+        it ends, and games that are reset or still running when the recorder is closed are written as they are. Games
+        without any moves aren't written.
+
+        Attributes:
+        _file   The binary file object that replays are written to.
+        _moves  The moves of the current game, as (action, x, y, milliseconds) tuples.
+        _owns   Whether the recorder opened the file itself, and so has to close it.
+        _start  The clock time of the first move of the current game, None if there hasn't been one yet.
+        game    The game that's being recorded.
+    """
+    def __init__(self, game, file):
+        """ :param file: The path of the replay file to append to, or a binary file object to write to. """
+        self.game = game
+        self._owns = not hasattr(file, 'write')
+        self._file = open(file, 'ab') if self._owns else file
+        self._moves = []
+        self._start = None
+        game.add_move_listener(self._on_move)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """ Write the current game and stop recording. """
+        self.game.remove_move_listener(self._on_move)
+        self._write()
+        if self._owns:
+            self._file.close()
+        else:
+            self._file.flush()
+
+    def _on_move(self, action, x, y):
+        """ The move listener. """
+        if action == 'reset':
+            self._write()
+            return
+        # A game that already ended was written already.
+        if not self._moves and self.game.done:
+            return
+        now = self.game.clock.now()
+        if self._start is None:
+            self._start = now
+        self._moves.append((action, x, y, round((now - self._start) * 1000)))
+        if self.game.done:
+            self._write()
+
+    def _write(self):
+        """ Write the current game, if it has any moves, and start recording a new one. """
+        game = self.game
+        if self._moves:
+            mines = game.mines.codes if game.mines is not None else None
+            # Seeds that don't fit in the header are left out, they're only informational.
+            seed = game.seed if game.seed is not None and 0 <= game.seed < 1 << 64 else None
+            self._file.write(encode_replay(Replay(
+                game.width, game.height, game.num_mines, game.first_never_mine, seed, mines, self._moves, game.done,
+                game.done and game.is_won(), game.time())))
+        self._moves = []
+        self._start = None
@@ -0,0 +1,43 @@
+""" Seeds for reproducible game generation. A `SeedSequence` turns a single root seed into any number of independent
+    child seeds, e.g. one per worker process in a simulation, in the spirit of NumPy's `SeedSequence`. Children are
+    derived by hashing the root entropy together with the child's position in the spawn tree, so runs with the same root
+    seed always get the same seeds, and seeds of different children aren't correlated.
+"""
+from hashlib import blake2b
+from os import urandom
+
+
+class SeedSequence:
+    """ A node in a tree of seeds.
+
+        Attributes:
+        entropy    The root seed as a non-negative integer, shared by the whole tree.
+        spawn_key  A tuple with the position of this node in the tree, empty for the root.
+    """
+    def __init__(self, entropy=None, spawn_key=()):
+        """ :param entropy: The root seed, None to draw one from the operating system. """
+        if entropy is None:
+            # Straight from the OS rather than through `secrets`, which is slow to import.
+            entropy = int.from_bytes(urandom(16), 'little')
+        if entropy < 0:
+            raise ValueError('The entropy must be a non-negative integer.')
+        self.entropy = entropy
+        self.spawn_key = tuple(spawn_key)
+        self._num_spawned = 0     # The number of children spawned so far, so repeated calls to `spawn` never overlap.
+
+    def __repr__(self):
+        return 'SeedSequence(entropy={}, spawn_key={})'.format(self.entropy, self.spawn_key)
+
+    def spawn(self, n):
+        """ Create `n` new child sequences. Subsequent calls continue where the previous call left off.
+            :returns: A list of `SeedSequence`s.
+        """
+        children = [SeedSequence(self.entropy, self.spawn_key + (i,))
+                    for i in range(self._num_spawned, self._num_spawned + n)]
+        self._num_spawned += n
+        return children
+
+    def generate_seed(self):
+        """ :returns: A 64-bit integer seed for this node, e.g. to seed a `random.Random` or a `Minesweeper` with. """
+        data = repr((self.entropy, self.spawn_key)).encode()
+        return int.from_bytes(blake2b(data, digest_size=8).digest(), 'little')
@@ -0,0 +1,208 @@
+""" An asyncio game server that hosts many `Minesweeper` sessions in a single thread, over TCP or a Unix socket.
+
+    The protocol is line based JSON. Every request is an object on its own line, with a `cmd` and the arguments of that
+    command, and gets a response object on its own line, in the same order. A request may carry an `id`, which is
+    echoed in its response. Clients may send any number of requests without waiting for their responses.
+    - {"cmd": "new", "difficulty": ..., "width": ..., "height": ..., "num_mines": ...}: Start a new session, the board
+      arguments are those of `Minesweeper.set_config` and default to the server's board. Custom boards must have
+      positive integer dimensions and at most the server's `max_squares` squares. Responds with the `session` id and
+      the board's `width`, `height` and `num_mines`.
+    - {"cmd": "select", "session": ..., "x": ..., "y": ...}: Select a square. Responds with `done`, `won`, the number of
+      `mines_left` and the `opened` squares as [x, y, value] lists, see `OpenedSquare`.
+    - {"cmd": "flag" or "question", "session": ..., "x": ..., "y": ...}: Toggle a flag or question mark. Responds with
+      whether the square `changed`, its new `value` and the number of `mines_left`.
+    - {"cmd": "reset", "session": ...}: Start a new game in the session. Responds with an empty object.
+    - {"cmd": "state", "session": ...}: Responds with the whole `state` as a nested list, `done`, `mines_left` and the
+      timer's `time`.
+    - {"cmd": "close", "session": ...}: End the session. Responds with an empty object.
+    Errors are reported as {"error": message}.
+
+    Sessions aren't tied to a connection, so several connections can play the same session. Every session has its own
+    lock, so commands on a session never interleave. Everything that was read from a connection in one go is handled
+    as a batch, whose responses are written back together. The games' timers run on the event loop, so hosting games
+    doesn't start any threads. A select is made with `Minesweeper.select_iter`, handing control back to the event loop
+    after every `SELECT_BATCH` opened squares, so a large cascade doesn't stall the other sessions.
+"""
+import asyncio
+from itertools import count
+import json
+
+from .clock import AsyncioClock
+from .minesweeper import Minesweeper, board_size
+from .seeding import SeedSequence
+
+# The maximum length of a request line, in bytes.
+MAX_LINE = 65536
+# The number of squares a select opens before it lets the event loop run other tasks.
+SELECT_BATCH = 2048
+
+
+class Session:
+    """ A game that's hosted by the server.
+
+        Attributes:
+        game  The `Minesweeper` game.
+        lock  The `asyncio.Lock` that serializes the commands on the game.
+    """
+    __slots__ = ('game', 'lock')
+
+    def __init__(self, game):
+        self.game = game
+        self.lock = asyncio.Lock()
+
+
+class GameServer:
+    """ The server, which maps session ids to sessions and handles the connections.
+
+        Attributes:
+        _ids          A counter for the session ids.
+        _seed         The root `SeedSequence`, from which every session's seed is spawned.
+        clock         The `AsyncioClock` that all games run their timers on.
+        config        The keyword arguments for `Minesweeper.set_config` of new sessions that don't specify a board.
+        max_sessions  The maximum number of sessions to host at the same time.
+        max_squares   The maximum number of squares of the boards that clients may ask for, as the memory of a game, the
+                      size of a response and the time a move takes grow with its board. At the default 10000 squares, a
+                      move takes tens of milliseconds and a response is at most about 130 kB.
+        sessions      A dict that maps session ids to `Session`s.
+    """
+    def __init__(self, difficulty='expert', width=None, height=None, num_mines=None, seed=None, max_sessions=100000,
+                 max_squares=10000):
+        """ :param seed: The root seed for the sessions as an integer or a `SeedSequence`, None for a random seed. """
+        if not isinstance(seed, SeedSequence):
+            seed = SeedSequence(seed)
+        self.config = dict(difficulty=difficulty, width=width, height=height, num_mines=num_mines)
+        self.max_sessions = max_sessions
+        self.max_squares = max_squares
+        self.sessions = {}
+        self.clock = AsyncioClock()
+        self._seed = seed
+        self._ids = count(1)
+
+    async def handle(self, reader, writer):
+        """ Handle a connection until the client closes it, see `asyncio.start_server`. """
+        pending = b''
+        try:
+            while True:
+                data = await reader.read(MAX_LINE)
+                if not data:
+                    break
+                lines = (pending + data).split(b'\n')
+                pending = lines.pop()
+                if len(pending) > MAX_LINE:
+                    writer.write(b'{"error":"The request is too long."}\n')
+                    break
+                responses = []
+                for line in lines:
+                    if line.strip():
+                        responses.append(json.dumps(await self.process(line), separators=(',', ':')).encode())
+                if responses:
+                    responses.append(b'')
+                    writer.write(b'\n'.join(responses))
+                    await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def process(self, line):
+        """ Handle a single request.
+            :param line: The request as a JSON encoded string or bytes.
+            :returns: The response as a dict.
+        """
+        request = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError('A request must be an object.')
+            command = request.get('cmd')
+            if command == 'new':
+                response = self._new(request)
+            else:
+                session = self.sessions.get(request.get('session'))
+                if session is None:
+                    raise ValueError('Unknown session.')
+                async with session.lock:
+                    response = await self._execute(session.game, command, request)
+                if command == 'close':
+                    self.sessions.pop(request['session'], None)
+        except (ValueError, TypeError, KeyError) as e:
+            response = {'error': str(e)}
+        if isinstance(request, dict) and 'id' in request:
+            response['id'] = request['id']
+        return response
+
+    def _new(self, request):
+        """ Start a new session. """
+        if len(self.sessions) >= self.max_sessions:
+            raise ValueError('There are too many sessions.')
+        config = self.config
+        if 'difficulty' in request:
+            config = dict(difficulty=request['difficulty'], width=request.get('width'), height=request.get('height'),
+                          num_mines=request.get('num_mines'))
+            if config['difficulty'] == 'custom':
+                self._check_board(config['width'], config['height'], config['num_mines'])
+        game = Minesweeper(seed=self._seed.spawn(1)[0], clock=self.clock)
+        game.set_config(**config)
+        session_id = str(next(self._ids))
+        self.sessions[session_id] = Session(game)
+        return {'session': session_id, 'width': game.width, 'height': game.height, 'num_mines': game.num_mines}
+
+    def _check_board(self, width, height, num_mines):
+        """ Check a custom board that a client asked for, before any memory is allocated for it. """
+        # Booleans are integers too, but never a sensible board size.
+        if not all(type(value) is int for value in (width, height, num_mines)):
+            raise ValueError('The width, height and number of mines must be integers.')
+        if width <= 0 or height <= 0:
+            raise ValueError('The width and height must be positive.')
+        if width*height > self.max_squares:
+            raise ValueError('The board has more than {} squares.'.format(self.max_squares))
+        board_size('custom', width, height, num_mines)
+
+    @staticmethod
+    async def _execute(game, command, request):
+        """ Execute a command on a session's game. """
+        if command in ('select', 'flag', 'question'):
+            x, y = request['x'], request['y']
+            if not (isinstance(x, int) and isinstance(y, int) and 0 <= x < game.width and 0 <= y < game.height):
+                raise ValueError('The square is not on the board.')
+            if command == 'select':
+                opened = []
+                for square in game.select_iter(x, y):
+                    opened.append(list(square))
+                    if len(opened) % SELECT_BATCH == 0:
+                        await asyncio.sleep(0)
+                done = game.done
+                return {'done': done, 'won': done and game.is_won(), 'mines_left': game.mines_left, 'opened': opened}
+            changed = game.flag(x, y) if command == 'flag' else game.question(x, y)
+            return {'changed': changed, 'value': game.state[y][x], 'mines_left': game.mines_left}
+        if command == 'reset':
+            game.reset()
+            return {}
+        if command == 'state':
+            return {'state': game.state.tolist(), 'done': game.done, 'mines_left': game.mines_left,
+                    'time': game.time()}
+        if command == 'close':
+            game.reset()
+            return {}
+        raise ValueError('Unknown command {!r}.'.format(command))
+
+    async def serve(self, host='127.0.0.1', port=8765, path=None):
+        """ Serve forever, on a Unix socket if a `path` is given, otherwise over TCP. """
+        if path is not None:
+            server = await asyncio.start_unix_server(self.handle, path, limit=MAX_LINE)
+        else:
+            server = await asyncio.start_server(self.handle, host, port, limit=MAX_LINE)
+        async with server:
+            await server.serve_forever()
+
+
+def main(args):
+    """ Run the server from the parsed `serve` command line arguments. """
+    server = GameServer(args.difficulty, getattr(args, 'width', None), getattr(args, 'height', None),
+                        getattr(args, 'num_mines', None), args.seed, args.max_sessions, args.max_squares)
+    where = args.unix if args.unix else '{}:{}'.format(args.host, args.port)
+    print('Serving on {}'.format(where))
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,186 @@
+""" Play large numbers of headless games across all cores, e.g. to evaluate a bot. Games are played in chunks by a
+    process pool, where every chunk gets its own child of a root `SeedSequence`, so the results only depend on the root
+    seed and not on the number of workers. Workers send back compact per-game records, which are folded into running
+    summary statistics as they come in.
+
+    A move policy is a callable `policy(game, rng)` that's given a `Minesweeper` game that isn't done yet and a
+    `random.Random` instance, and returns the (x, y) square to select next. It must be importable by the workers, i.e.
+    defined at the top level of a module.
+"""
+from collections import namedtuple
+from importlib import import_module
+from math import sqrt
+from multiprocessing import Pool, cpu_count
+from random import Random
+from struct import Struct
+import time
+
+from .board import CLOSED
+from .clock import VirtualClock
+from .minesweeper import Minesweeper
+from .seeding import SeedSequence
+
+# A tuple to store the outcome of a single simulated game in.
+# :param won: Whether the game was won.
+# :param moves: The number of moves that were made.
+# :param opened: The number of safe squares that were opened.
+# :param wall_time: The time it took to play the game, in seconds.
+GameRecord = namedtuple('GameRecord', 'won, moves, opened, wall_time')
+# The binary layout of a `GameRecord`, used to send records from the workers to the parent.
+_RECORD = Struct('<?IIf')
+
+
+def random_policy(game, rng):
+    """ A move policy that selects a random closed square. """
+    codes = game.state.codes
+    # Guessing is cheap while most squares are closed, fall back to listing the closed squares once it isn't.
+    for _ in range(8):
+        i = rng.randrange(len(codes))
+        if codes[i] == CLOSED:
+            break
+    else:
+        i = rng.choice([i for i, code in enumerate(codes) if code == CLOSED])
+    return i % game.width, i // game.width
+
+
+def load_policy(path):
+    """ Load a move policy from a 'module:function' path. """
+    module, _, name = path.partition(':')
+    if not name:
+        raise ValueError("A policy must be given as 'module:function', got {!r}.".format(path))
+    return getattr(import_module(module), name)
+
+
+def play_game(game, policy, rng, max_moves=None):
+    """ Play a single game with the given policy, from a freshly reset game until it ends.
+        :param max_moves: The maximum number of moves to make, None for no limit. A game that reaches the limit is lost.
+        :returns: A `GameRecord`.
+    """
+    start = time.perf_counter()
+    moves = 0
+    while not game.done and (max_moves is None or moves < max_moves):
+        game.select(*policy(game, rng))
+        moves += 1
+    return GameRecord(game.done and game.is_won(), moves, game.opened_count, time.perf_counter() - start)
+
+
+def _play_chunk(task):
+    """ Play a chunk of games in a worker process.
+        :param task: A (config, policy, seed_sequence, num_games, max_moves) tuple, where `config` holds the keyword
+                     arguments for `Minesweeper.set_config`.
+        :returns: The packed `GameRecord`s as bytes.
+    """
+    config, policy, seed_sequence, num_games, max_moves = task
+    game_seed, policy_seed = seed_sequence.spawn(2)
+    # Games are played without listeners, so a virtual clock that never moves keeps the timer free of threads.
+    game = Minesweeper(seed=game_seed, clock=VirtualClock())
+    game.set_config(**config)
+    rng = Random(policy_seed.generate_seed())
+    records = bytearray()
+    for _ in range(num_games):
+        game.reset()
+        records += _RECORD.pack(*play_game(game, policy, rng, max_moves))
+    return bytes(records)
+
+
+class RunningStats:
+    """ Streaming mean, standard deviation, minimum and maximum of a series of values, using Welford's algorithm. """
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0          # The sum of squared differences from the mean.
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    @property
+    def std(self):
+        return sqrt(self._m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+
+class Summary:
+    """ Aggregated statistics over simulated games.
+
+        Attributes:
+        games      The number of games played.
+        moves      `RunningStats` on the number of moves per game.
+        opened     `RunningStats` on the number of opened safe squares per game.
+        wall_time  `RunningStats` on the time it took to play each game.
+        wins       The number of games won.
+    """
+    def __init__(self):
+        self.games = 0
+        self.wins = 0
+        self.moves = RunningStats()
+        self.opened = RunningStats()
+        self.wall_time = RunningStats()
+
+    def add(self, record):
+        """ Add a `GameRecord` to the statistics. """
+        self.games += 1
+        self.wins += record.won
+        self.moves.add(record.moves)
+        self.opened.add(record.opened)
+        self.wall_time.add(record.wall_time)
+
+    @property
+    def win_rate(self):
+        return self.wins / self.games if self.games else 0.0
+
+    def report(self):
+        """ :returns: A human readable report as a string. """
+        lines = ['games: {}, won: {} ({:.2%})'.format(self.games, self.wins, self.win_rate)]
+        for name, stats, unit in (('moves', self.moves, 1), ('opened', self.opened, 1),
+                                  ('wall time (ms)', self.wall_time, 1000)):
+            if stats.count:
+                lines.append('{}: mean {:.3f}, std {:.3f}, min {:.3f}, max {:.3f}'.format(
+                    name, stats.mean*unit, stats.std*unit, stats.min*unit, stats.max*unit))
+        return '\n'.join(lines)
+
+
+def simulate(num_games, policy=random_policy, workers=None, seed=None, chunk_size=100, max_moves=None,
+             difficulty='expert', width=None, height=None, num_mines=None, first_never_mine=True, on_record=None):
+    """ Play `num_games` games with the given policy across a pool of worker processes.
+        :param workers: The number of worker processes, None to use all cores.
+        :param seed: The root seed as an integer or a `SeedSequence`, None for a random seed.
+        :param chunk_size: The number of games each task plays, trading scheduling overhead for load balancing.
+        :param on_record: An optional callable that's called with every `GameRecord` as it comes in.
+        The remaining parameters are those of `Minesweeper.set_config` and `play_game`.
+        :returns: A `Summary` of the games.
+    """
+    if not isinstance(seed, SeedSequence):
+        seed = SeedSequence(seed)
+    config = dict(difficulty=difficulty, width=width, height=height, num_mines=num_mines,
+                  first_never_mine=first_never_mine)
+    sizes = [chunk_size] * (num_games // chunk_size)
+    if num_games % chunk_size:
+        sizes.append(num_games % chunk_size)
+    tasks = [(config, policy, child, size, max_moves) for child, size in zip(seed.spawn(len(sizes)), sizes)]
+    summary = Summary()
+    with Pool(workers or cpu_count()) as pool:
+        for records in pool.imap_unordered(_play_chunk, tasks):
+            for record in _RECORD.iter_unpack(records):
+                record = GameRecord(*record)
+                summary.add(record)
+                if on_record is not None:
+                    on_record(record)
+    return summary
+
+
+def main(args):
+    """ Run a simulation from the parsed `simulate` command line arguments and print a summary. """
+    policy = load_policy(args.policy) if args.policy else random_policy
+    start = time.perf_counter()
+    summary = simulate(args.games, policy, args.workers, args.seed, args.chunk_size, args.max_moves,
+                       args.difficulty, getattr(args, 'width', None), getattr(args, 'height', None),
+                       getattr(args, 'num_mines', None))
+    elapsed = time.perf_counter() - start
+    print(summary.report())
+    print('elapsed: {:.2f}s ({:.0f} games/s)'.format(elapsed, summary.games / elapsed if elapsed else 0))
@@ -0,0 +1,5 @@
+""" This package contains solvers that reason about a game's `Minesweeper.state`, to find the squares that are certainly
+    safe or certainly hold a mine, and the mine probabilities of the squares for when a guess can't be avoided.
+"""
+from .constraints import ConstraintSolver, Deductions
+from .probability import ProbabilityEngine, mine_probabilities
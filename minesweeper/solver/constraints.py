@@ -0,0 +1,165 @@
+""" A constraint propagation solver for minesweeper. Every opened number is a constraint on its closed neighbors: exactly
+    that many of them hold a mine. The solver applies two rules to the numbered frontier:
+    - Single point: if a number already touches as many known mines as its value, its other closed neighbors are safe,
+      and if its closed neighbors can only hold its value in mines, they're all mines.
+    - Subset: if the unknown neighbors of number A are a subset of those of number B, the squares that only B touches
+      hold the difference of their remaining mines, which decides them when that's 0 or all of them.
+
+    The solver is incremental: it remembers what it learned, and after a move it only revisits the numbers around the
+    squares that changed, so it's cheap enough to run after every `select` in a bot loop. Flags are treated as closed
+    squares, as they may have been placed wrongly.
+"""
+from collections import namedtuple
+
+from ..board import CLOSED, ENCODE
+from ..geometry import Geometry
+
+# A tuple to store the solver's conclusions in.
+# :param safe: A list of (x, y) tuples of closed squares that certainly don't hold a mine.
+# :param mines: A list of (x, y) tuples of closed squares that certainly hold a mine.
+Deductions = namedtuple('Deductions', 'safe, mines')
+
+
+class ConstraintSolver:
+    """ An incremental solver for the state of a single game. Create a new solver, or `reset` it, for every new game.
+
+        Attributes:
+        _codes        The solver's copy of the state codes of the game, as of the last `update`.
+        _constraints  A dict that maps the flat index of each number that still has unknown neighbors, to a tuple of the
+                      frozenset of those neighbors and the number of mines among them.
+        _geometry     The shared `Geometry` of the board.
+        _mines        A set of the flat indices of the squares that are known to hold a mine.
+        _safe         A set of the flat indices of the closed squares that are known to be safe.
+        height        The number of squares along the height.
+        width         The number of squares along the width.
+    """
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self._geometry = Geometry.of(width, height)
+        self.reset()
+
+    def reset(self):
+        """ Forget everything, to start solving a new game. """
+        self._codes = bytearray([CLOSED]) * self._geometry.size
+        self._constraints = {}
+        self._mines = set()
+        self._safe = set()
+
+    def update(self, state, changed=None):
+        """ Bring the solver up to date with the state of the game and propagate the constraints.
+            :param state: The game's `Minesweeper.state`, or an equivalent 2D nested list indexed as `state[y][x]`.
+            :param changed: The squares that changed since the last update, as (x, y, ...) tuples, e.g. the
+                            `OpenedSquare`s returned by `select`. None to find them by comparing the whole state.
+            :returns: The `Deductions` for the current state.
+        """
+        codes = getattr(state, 'codes', None)
+        if codes is None:
+            codes = bytearray(ENCODE[value] for row in state for value in row)
+        width = self.width
+        if changed is None:
+            old = self._codes
+            changed = [i for i in range(len(codes)) if codes[i] != old[i]]
+        else:
+            changed = [square[1]*width + square[0] for square in changed]
+        own, offsets, indices = self._codes, self._geometry.offsets, self._geometry.indices
+        dirty = set()
+        for i in changed:
+            own[i] = code = codes[i]
+            if code <= 8:
+                self._safe.discard(i)
+                dirty.add(i)
+            # Numbers around the changed square may have lost an unknown neighbor.
+            for p in range(offsets[i], offsets[i+1]):
+                if own[indices[p]] <= 8:
+                    dirty.add(indices[p])
+        self._propagate(dirty)
+        return self.deductions()
+
+    def deductions(self):
+        """ :returns: The `Deductions` that are known so far. """
+        width, codes = self.width, self._codes
+        return Deductions([(i % width, i // width) for i in sorted(self._safe)],
+                          [(i % width, i // width) for i in sorted(self._mines) if codes[i] > 8])
+
+    def _propagate(self, dirty):
+        """ Apply the rules to the dirty numbers until nothing new can be learned. Whenever a square is decided, the
+            numbers around it become dirty again.
+            :param dirty: A set of the flat indices of the numbers to revisit.
+        """
+        mines, safe = self._mines, self._safe
+        while dirty:
+            c = dirty.pop()
+            constraint = self._refresh(c)
+            if constraint is None:
+                continue
+            unknown, needed = constraint
+            decided_safe, decided_mines = (), ()
+            # The single point rules.
+            if needed == 0:
+                decided_safe = unknown
+            elif needed == len(unknown):
+                decided_mines = unknown
+            else:
+                # The subset rule, against all numbers that could share a neighbor with this one.
+                for other in self._nearby_constraints(c):
+                    # Refresh the other number first, so all squares that the rule decides are still unknown.
+                    other = self._refresh(other)
+                    if other is None:
+                        continue
+                    other_unknown, other_needed = other
+                    if unknown < other_unknown:
+                        outer, remaining = other_unknown - unknown, other_needed - needed
+                    elif other_unknown < unknown:
+                        outer, remaining = unknown - other_unknown, needed - other_needed
+                    else:
+                        continue
+                    if remaining == 0:
+                        decided_safe = outer
+                    elif remaining == len(outer):
+                        decided_mines = outer
+                    else:
+                        continue
+                    # Re-evaluate this number later on, as it may have more subsets to check.
+                    dirty.add(c)
+                    break
+            for squares, known in ((decided_safe, safe), (decided_mines, mines)):
+                for i in squares:
+                    known.add(i)
+                    dirty.update(self._numbers_around(i))
+
+    def _refresh(self, c):
+        """ Recompute the constraint of the number at flat index `c`.
+            :returns: The (unknown, needed) constraint, None if the number has no unknown neighbors left.
+        """
+        codes, mines, safe = self._codes, self._mines, self._safe
+        offsets, indices = self._geometry.offsets, self._geometry.indices
+        needed = codes[c]
+        unknown = []
+        for p in range(offsets[c], offsets[c+1]):
+            i = indices[p]
+            if codes[i] > 8:
+                if i in mines:
+                    needed -= 1
+                elif i not in safe:
+                    unknown.append(i)
+        if not unknown:
+            self._constraints.pop(c, None)
+            return None
+        constraint = self._constraints[c] = (frozenset(unknown), needed)
+        return constraint
+
+    def _numbers_around(self, i):
+        """ :returns: The flat indices of the opened numbers that neighbor the square at flat index `i`. """
+        codes, offsets, indices = self._codes, self._geometry.offsets, self._geometry.indices
+        return [indices[p] for p in range(offsets[i], offsets[i+1]) if codes[indices[p]] <= 8]
+
+    def _nearby_constraints(self, c):
+        """ :returns: The numbers with unknown neighbors within two squares of the number at flat index `c`, as those
+                      are the only ones that can share a neighbor with it.
+        """
+        width, height, constraints = self.width, self.height, self._constraints
+        x, y = c % width, c // width
+        return [i for yi in range(max(y-2, 0), min(y+3, height))
+                for i in range(yi*width + max(x-2, 0), yi*width + min(x+3, width))
+                if i != c and i in constraints]
@@ -0,0 +1,110 @@
+""" Generation of boards that can be solved without guessing from the first click. Candidate layouts are drawn uniformly
+    and played by a deterministic solver, which opens the squares that the `ConstraintSolver` proves to be safe until it
+    either wins or gets stuck. Candidates are rejected as soon as the solver gets stuck, and generation gives up once its
+    time or attempt budget runs out.
+
+    The throughput of the generation is tracked per board size in `STATS`, to size the feature for production.
+"""
+from threading import Lock
+import time
+
+from ..geometry import Geometry
+from ..placement import place_mines
+from .constraints import ConstraintSolver
+
+
+class GenerationStats:
+    """ Throughput metrics of guess-free generation for a single board size.
+
+        Attributes:
+        attempts  The number of candidate layouts that were tried.
+        boards    The number of guess-free boards that were generated.
+        elapsed   The total time spent generating, in seconds.
+        failures  The number of times generation ran out of budget.
+    """
+    def __init__(self):
+        self.attempts = 0
+        self.boards = 0
+        self.elapsed = 0.0
+        self.failures = 0
+
+    @property
+    def boards_per_second(self):
+        return self.boards / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def attempts_per_board(self):
+        return self.attempts / self.boards if self.boards else float('inf')
+
+    def __repr__(self):
+        return ('GenerationStats(boards={}, attempts={}, failures={}, elapsed={:.3f}, boards_per_second={:.1f})'
+                .format(self.boards, self.attempts, self.failures, self.elapsed, self.boards_per_second))
+
+
+# The `GenerationStats` per (width, height, num_mines).
+STATS = {}
+_stats_lock = Lock()
+
+
+def is_guess_free(width, height, num_mines, mines, start):
+    """ Check whether a layout can be solved without guessing, by playing it with the solver.
+        :param mines: The mine layout as a flat `bytearray`, see `Minesweeper.set_mines`.
+        :param start: The (x, y) square of the first click, which must not hold a mine.
+        :returns: True if the solver wins the game.
+    """
+    # Terminate early when the first click doesn't open a zero, as a single number can never prove a square safe.
+    geometry = Geometry.of(width, height)
+    if any(mines[i] for i in geometry.neighbors(start[1]*width + start[0])):
+        return False
+    # Imported here, as the game itself imports this module lazily when generating guess-free boards.
+    from ..clock import VirtualClock
+    from ..minesweeper import Minesweeper
+    game = Minesweeper(seed=0, clock=VirtualClock())
+    game.set_config('custom', width, height, num_mines, first_never_mine=True)
+    game.set_mines(mines)
+    solver = ConstraintSolver(width, height)
+    done, opened = game.select(*start)
+    while not done:
+        safe, known_mines = solver.update(game.state, opened)
+        if not safe:
+            # Once all mines are known, the remaining closed squares are safe. Otherwise, a guess would be needed.
+            if len(known_mines) < num_mines:
+                return False
+            codes = game.state.codes
+            safe = [(i % width, i // width) for i in range(len(codes)) if codes[i] > 8 and not mines[i]]
+        opened = []
+        for x, y in safe:
+            done, squares = game.select(x, y)
+            opened += squares
+    return game.is_won()
+
+
+def generate_guess_free(width, height, num_mines, start, rng=None, timeout=None, max_attempts=None):
+    """ Generate a uniformly drawn layout among those that can be solved without guessing from the start square.
+        :param start: The (x, y) square of the first click, which will be free from mines.
+        :param rng: The `random.Random` instance to draw from, None to use the global `random` functions.
+        :param timeout: The maximum time to spend, in seconds, None for no limit.
+        :param max_attempts: The maximum number of candidate layouts to try, None for no limit.
+        :returns: The mines as a flat `bytearray`, or None if the budget ran out before a layout was found.
+    """
+    started = time.perf_counter()
+    safe = start[1]*width + start[0]
+    attempts = 0
+    mines = None
+    while max_attempts is None or attempts < max_attempts:
+        if timeout is not None and attempts and time.perf_counter() - started > timeout:
+            break
+        attempts += 1
+        candidate = place_mines(width*height, num_mines, safe, rng)
+        if is_guess_free(width, height, num_mines, candidate, start):
+            mines = candidate
+            break
+    with _stats_lock:
+        stats = STATS.setdefault((width, height, num_mines), GenerationStats())
+        stats.attempts += attempts
+        stats.elapsed += time.perf_counter() - started
+        if mines is None:
+            stats.failures += 1
+        else:
+            stats.boards += 1
+    return mines
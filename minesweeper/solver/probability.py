@@ -0,0 +1,237 @@
+""" Exact mine probabilities for the closed squares of a game, for when there's no safe move left and a bot has to guess.
+
+    The closed squares next to an opened number form the frontier, all other closed squares form the interior. The
+    frontier is split into independent components, groups of squares that are linked through shared numbers, and the
+    solutions of every component are counted per number of mines with a dynamic program over its squares. The
+    components are combined with the interior, whose mines can be anywhere, by weighting every combination with the
+    number of ways to place the remaining mines in the interior, a binomial coefficient. The total number of mines is
+    the global constraint.
+
+    Components tend to survive from one move to the next, so their enumerations are cached by their signature: the
+    squares and numbers that make up the component.
+"""
+from collections import OrderedDict
+from functools import lru_cache
+from math import comb
+
+from ..board import ENCODE
+from ..geometry import Geometry
+
+
+@lru_cache(maxsize=4096)
+def binomial(n, k):
+    """ A memoized binomial coefficient, 0 if `k` is out of range. """
+    return comb(n, k) if 0 <= k <= n else 0
+
+
+class ProbabilityEngine:
+    """ Computes the mine probability of every closed square of a game's state. Flags are treated as closed squares, as
+        they may have been placed wrongly, so the probabilities are based on the total number of mines.
+
+        Attributes:
+        _cache      An `OrderedDict` that maps component signatures to their enumerations, in least recently used order.
+        _geometry   The shared `Geometry` of the board.
+        cache_size  The maximum number of component enumerations to cache.
+        height      The number of squares along the height.
+        width       The number of squares along the width.
+    """
+    def __init__(self, width, height, cache_size=1024):
+        self.width = width
+        self.height = height
+        self.cache_size = cache_size
+        self._geometry = Geometry.of(width, height)
+        self._cache = OrderedDict()
+
+    def probabilities(self, state, num_mines):
+        """ Compute the exact probability that each closed square holds a mine.
+            :param state: The game's `Minesweeper.state`, or an equivalent 2D nested list indexed as `state[y][x]`.
+            :param num_mines: The total number of mines in the game, i.e. `Minesweeper.num_mines`.
+            :returns: A dict that maps the (x, y) tuple of every closed square to its probability of holding a mine.
+        """
+        codes = getattr(state, 'codes', None)
+        if codes is None:
+            codes = bytearray(ENCODE[value] for row in state for value in row)
+        components, interior = self._components(codes)
+        enumerations = [self._enumerate(cells, constraints) for cells, constraints in components]
+        # The number of ways to place mines in the frontier, per total number of frontier mines, for all components
+        # before (prefix) and after (suffix) each component.
+        solutions = [{m: count for m, (count, _) in counts.items()} for counts in enumerations]
+        prefix = [{0: 1}]
+        for counts in solutions:
+            prefix.append(_convolve(prefix[-1], counts))
+        suffix = [{0: 1}]
+        for counts in reversed(solutions):
+            suffix.append(_convolve(suffix[-1], counts))
+        suffix.reverse()
+        num_interior = len(interior)
+        total = sum(ways * binomial(num_interior, num_mines - k) for k, ways in prefix[-1].items())
+        if total == 0:
+            raise ValueError('The state is inconsistent, there is no way to place the mines.')
+        width = self.width
+        probabilities = {}
+        for (cells, _), counts, before, after in zip(components, enumerations, prefix, suffix[1:]):
+            others = _convolve(before, after)
+            mine_ways = [0] * len(cells)
+            for m, (_, per_cell) in counts.items():
+                weight = sum(ways * binomial(num_interior, num_mines - m - k) for k, ways in others.items())
+                if weight:
+                    for j, count in enumerate(per_cell):
+                        mine_ways[j] += count * weight
+            for i, ways in zip(cells, mine_ways):
+                probabilities[(i % width, i // width)] = ways / total
+        if num_interior:
+            # Every interior square is equally likely to hold each of the mines that don't end up in the frontier.
+            interior_mines = sum(ways * binomial(num_interior, num_mines - k) * (num_mines - k)
+                                 for k, ways in prefix[-1].items())
+            # Divided in one go, as the counts can be too large for a float on huge boards, the probability never is.
+            probability = interior_mines / (num_interior * total)
+            for i in interior:
+                probabilities[(i % width, i // width)] = probability
+        return probabilities
+
+    def _components(self, codes):
+        """ Split the closed squares into frontier components and the interior.
+            :returns: A list of (cells, constraints) tuples, one per component, where `cells` is a sorted tuple of the
+                      component's flat indices and `constraints` a sorted tuple of (cells, number) tuples, and a list of
+                      the flat indices of the interior squares.
+        """
+        offsets, indices = self._geometry.offsets, self._geometry.indices
+        parent = {}
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        constraints = []
+        for c in range(len(codes)):
+            if codes[c] <= 8:
+                closed = tuple(indices[p] for p in range(offsets[c], offsets[c+1]) if codes[indices[p]] > 8)
+                if closed:
+                    constraints.append((closed, codes[c]))
+                    for i in closed:
+                        parent.setdefault(i, i)
+                    root = find(closed[0])
+                    for i in closed[1:]:
+                        parent[find(i)] = root
+        grouped = {}
+        for constraint in constraints:
+            grouped.setdefault(find(constraint[0][0]), []).append(constraint)
+        components = []
+        for group in grouped.values():
+            cells = tuple(sorted({i for closed, _ in group for i in closed}))
+            components.append((cells, tuple(sorted(group))))
+        interior = [i for i in range(len(codes)) if codes[i] > 8 and i not in parent]
+        return components, interior
+
+    def _enumerate(self, cells, constraints):
+        """ Count the solutions of a component, using the cache when possible.
+            :returns: A dict that maps each possible number of mines in the component to a (solutions, per_cell) tuple,
+                      where `per_cell` holds the number of those solutions with a mine on each of the cells.
+        """
+        signature = (cells, constraints)
+        counts = self._cache.get(signature)
+        if counts is not None:
+            self._cache.move_to_end(signature)
+            return counts
+        counts = _count_assignments(cells, constraints)
+        self._cache[signature] = counts
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return counts
+
+
+def _count_assignments(cells, constraints):
+    """ Count all mine assignments of a component that satisfy its constraints, see `ProbabilityEngine._enumerate`.
+        Cells are assigned in the order in which the constraints touch them, so constraints are completed, and dead ends
+        pruned, as early as possible. Which assignments remain after a cell only depends on how many mines were placed
+        in the constraints that are still open at that point, so those mine counts are the states of a dynamic program.
+        As frontiers are mostly long and thin, there are few of them, which keeps the count far from exponential.
+
+        The states that can be reached at every position are found in a forward pass, and the counts of the cells from
+        each position on are then combined in a backward pass, one position at a time. Both passes are iterative, so
+        components of any length can be counted, and only the counts of a single position are kept at a time.
+    """
+    order = []
+    seen = set()
+    for closed, _ in constraints:
+        for i in closed:
+            if i not in seen:
+                seen.add(i)
+                order.append(i)
+    n = len(order)
+    position = {i: j for j, i in enumerate(order)}
+    cell_constraints = [[] for _ in order]
+    targets = []
+    for c, (closed, number) in enumerate(constraints):
+        targets.append(number)
+        for i in closed:
+            cell_constraints[position[i]].append(c)
+    # The constraints that have cells both before and at or after each position, whose mine counts make up the state.
+    spans = [(min(position[i] for i in closed), max(position[i] for i in closed)) for closed, _ in constraints]
+    open_at = [[] for _ in range(n + 1)]
+    for c, (first, last) in enumerate(spans):
+        for j in range(first + 1, last + 1):
+            open_at[j].append(c)
+    # The number of cells of each constraint after every position, to prune states that can't meet their targets.
+    remaining = [[sum(1 for i in constraints[c][0] if position[i] > j) for c in cell_constraints[j]] for j in range(n)]
+
+    # The forward pass: the transitions of every state that can be reached, as (value, next state) tuples per state.
+    transitions = []
+    states = {()}
+    for j in range(n):
+        slots = {c: k for k, c in enumerate(open_at[j])}
+        touched = {c: k for k, c in enumerate(cell_constraints[j])}
+        moves = {}
+        next_states = set()
+        for state in states:
+            moves[state] = state_moves = []
+            for value in (0, 1):
+                mines = [(state[slots[c]] if c in slots else 0) + value for c in cell_constraints[j]]
+                if all(m <= targets[c] <= m + r for m, c, r in zip(mines, cell_constraints[j], remaining[j])):
+                    next_state = tuple(mines[touched[c]] if c in touched else state[slots[c]] for c in open_at[j + 1])
+                    state_moves.append((value, next_state))
+                    next_states.add(next_state)
+        transitions.append(moves)
+        states = next_states
+
+    # The backward pass: the counts of the assignments of the cells from position `j` on, for every state at `j`, as
+    # dicts that map a number of mines to a (solutions, per_cell) tuple.
+    counts = {state: {0: (1, ())} for state in states}
+    for j in range(n - 1, -1, -1):
+        previous = {}
+        for state, state_moves in transitions[j].items():
+            result = {}
+            for value, next_state in state_moves:
+                for m, (solutions, per_cell) in counts[next_state].items():
+                    per_cell = (solutions if value else 0,) + per_cell
+                    entry = result.get(m + value)
+                    if entry is not None:
+                        solutions += entry[0]
+                        per_cell = tuple(a + b for a, b in zip(entry[1], per_cell))
+                    result[m + value] = (solutions, per_cell)
+            previous[state] = result
+        counts = previous
+        # The transitions of this position aren't needed anymore.
+        transitions[j] = None
+
+    # Report the per cell counts in the order of `cells`.
+    return {m: (solutions, tuple(per_cell[position[i]] for i in cells))
+            for m, (solutions, per_cell) in counts[()].items()}
+
+
+def _convolve(a, b):
+    """ Combine two {mines: ways} distributions of independent parts of the board into one. """
+    result = {}
+    for m, ways in a.items():
+        for n, other in b.items():
+            result[m + n] = result.get(m + n, 0) + ways * other
+    return result
+
+
+def mine_probabilities(state, num_mines):
+    """ A shortcut to compute the mine probabilities of a state with a new `ProbabilityEngine`, see
+        `ProbabilityEngine.probabilities`.
+    """
+    return ProbabilityEngine(len(state[0]), len(state)).probabilities(state, num_mines)
@@ -0,0 +1,154 @@
+""" Verify large archives of replay files across all cores, e.g. for leaderboard integrity. Every replay is re-executed
+    and checked with `replay.check`.
+
+    Files are found by walking the given directories with `os.scandir` as the verification goes, and only a bounded
+    number of tasks is in flight at any time, so millions of files can be verified without listing them all up front.
+    Every task is a chunk of files, which a worker reads one replay at a time, and it only sends back counts and the
+    first few failures, so the parent's work, and memory use, stays small no matter how many workers there are.
+"""
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import cpu_count
+import os
+import time
+
+from .clock import VirtualClock
+from .minesweeper import Minesweeper
+from .replay import check, iter_replays
+
+# The number of failures per task that are reported in detail.
+_MAX_FAILURES = 10
+# The game that a worker replays on, reused for all of its replays.
+_game = None
+
+
+def iter_files(paths, suffix='.replay'):
+    """ Generate the replay files at the given paths, walking directories recursively.
+        :param paths: Paths to replay files, which are always included, or directories.
+        :param suffix: The suffix of the replay files to include from directories.
+    """
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        directories = [path]
+        while directories:
+            with os.scandir(directories.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        directories.append(entry.path)
+                    elif entry.name.endswith(suffix):
+                        yield entry.path
+
+
+def _verify_files(task):
+    """ Verify a chunk of replay files in a worker process.
+        :param task: A (paths, min_move_ms, max_squares) tuple.
+        :returns: A (files, replays, failure counts, failures) tuple, where the failure counts are a `Counter` of the
+                  names of the failed checks, and failures a list of the first (path, index, check) tuples.
+    """
+    global _game
+    if _game is None:
+        _game = Minesweeper(seed=0, clock=VirtualClock())
+    paths, min_move_ms, max_squares = task
+    replays = 0
+    counts = Counter()
+    failures = []
+    for path in paths:
+        index = 0
+        try:
+            for index, replay in enumerate(iter_replays(path, max_squares)):
+                replays += 1
+                failed = check(replay, _game, min_move_ms, max_squares)
+                if failed is not None:
+                    counts[failed] += 1
+                    if len(failures) < _MAX_FAILURES:
+                        failures.append((path, index, failed))
+        except (OSError, ValueError, IndexError) as e:
+            counts['corrupt'] += 1
+            if len(failures) < _MAX_FAILURES:
+                failures.append((path, index, 'corrupt: {}'.format(e)))
+    return len(paths), replays, counts, failures
+
+
+class Report:
+    """ The aggregated outcome of a verification.
+
+        Attributes:
+        counts    A `Counter` of the names of the failed checks.
+        failures  The first few failures, as (path, index, check) tuples.
+        files     The number of files that were verified.
+        replays   The number of replays that were verified.
+    """
+    def __init__(self):
+        self.files = 0
+        self.replays = 0
+        self.counts = Counter()
+        self.failures = []
+
+    def add(self, result):
+        """ Add the result of a task to the report. """
+        files, replays, counts, failures = result
+        self.files += files
+        self.replays += replays
+        self.counts += counts
+        self.failures += failures[:max(_MAX_FAILURES - len(self.failures), 0)]
+
+    @property
+    def invalid(self):
+        return sum(count for name, count in self.counts.items() if name != 'corrupt')
+
+    def report(self):
+        """ :returns: A human readable report as a string. """
+        lines = ['files: {}, replays: {}, invalid: {} ({:.2%})'.format(
+            self.files, self.replays, self.invalid, self.invalid / self.replays if self.replays else 0)]
+        if self.counts:
+            lines.append(', '.join('{}: {}'.format(name, count) for name, count in self.counts.most_common()))
+        for path, index, name in self.failures:
+            lines.append('{}#{}: {}'.format(path, index, name))
+        return '\n'.join(lines)
+
+
+def verify_replays(paths, workers=None, chunk_size=64, min_move_ms=0, suffix='.replay', max_squares=1000000):
+    """ Verify all replays in the given files and directories across a pool of worker processes.
+        :param workers: The number of worker processes, None to use all cores.
+        :param chunk_size: The number of files per task.
+        :param min_move_ms: The minimum time between moves, see `replay.check`.
+        :param max_squares: The maximum number of squares of a replay's board, see `replay.iter_replays`.
+        :returns: A `Report`.
+    """
+    workers = workers or cpu_count()
+    # Enough tasks to keep every worker busy, while the files are still being found.
+    max_in_flight = 4 * workers
+    report = Report()
+    with ProcessPoolExecutor(workers) as executor:
+        in_flight = set()
+        chunk = []
+        files = iter_files(paths, suffix)
+        while True:
+            path = next(files, None)
+            if path is not None:
+                chunk.append(path)
+                if len(chunk) < chunk_size:
+                    continue
+            if chunk:
+                in_flight.add(executor.submit(_verify_files, (chunk, min_move_ms, max_squares)))
+                chunk = []
+            if path is None or len(in_flight) >= max_in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED) if in_flight else ((), in_flight)
+                for future in done:
+                    report.add(future.result())
+                if path is None and not in_flight:
+                    break
+    return report
+
+
+def main(args):
+    """ Run a verification from the parsed `verify-replays` command line arguments and print a report. """
+    start = time.perf_counter()
+    report = verify_replays(args.paths, args.workers, args.chunk_size, args.min_move_ms, args.suffix,
+                            args.max_squares)
+    elapsed = time.perf_counter() - start
+    print(report.report())
+    print('elapsed: {:.2f}s ({:.0f} replays/s)'.format(elapsed, report.replays / elapsed if elapsed else 0))
+    return 1 if report.counts else 0
@@ -9,5 +9,7 @@ setup(name='minesweeper',
       url='https://github.com/JohnnyDeuss/minesweeper',
       project_urls={'Source': 'https://github.com/JohnnyDeuss/minesweeper'},
       install_requires=['PyQt5==5.11.3'],
-      packages=find_packages()
+      extras_require={'numpy': ['numpy']},
+      packages=find_packages(),
+      package_data={'minesweeper.gui': ['resources.rcc']}
     )
@@ -0,0 +1,96 @@
+""" Tests that `BatchMinesweeper` matches `Minesweeper` exactly, by playing random moves on both in lockstep. """
+from random import Random
+from zlib import crc32
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from minesweeper.batch import BatchMinesweeper  # noqa: E402
+from minesweeper.clock import VirtualClock  # noqa: E402
+from minesweeper.minesweeper import Minesweeper  # noqa: E402
+
+# The number of games per batch, and the maximum number of moves per game.
+GAMES = 40
+STEPS = 300
+BOARDS = [
+    ('beginner', None, None, None),
+    ('expert', None, None, None),
+    ('custom', 5, 3, 2),
+    ('custom', 17, 9, 30),
+    ('custom', 40, 25, 100),
+]
+
+
+def random_moves(batch, rng, prefer):
+    """ :returns: A random (x, y) square for every game, replaced by one matching `prefer` in games that have their
+                  mines, when there is such a square.
+    """
+    moves = np.array([[rng.randrange(batch.width), rng.randrange(batch.height)] for _ in range(batch.count)])
+    for k in range(batch.count):
+        if batch.placed[k]:
+            ys, xs = np.nonzero(prefer(k))
+            if len(xs):
+                j = rng.randrange(len(xs))
+                moves[k] = xs[j], ys[j]
+    return moves
+
+
+def assert_same(batch, games):
+    for k, game in enumerate(games):
+        assert batch.state[k].tobytes() == bytes(game.state.codes)
+        assert batch.done[k] == game.done
+        assert batch.mines_left[k] == game.mines_left
+        assert batch.opened_count[k] == game.opened_count
+
+
+@pytest.mark.parametrize('difficulty, width, height, num_mines', BOARDS)
+@pytest.mark.parametrize('first_never_mine', [True, False])
+def test_lockstep(difficulty, width, height, num_mines, first_never_mine):
+    # A fixed seed per case, as the hashes of strings change between runs.
+    rng = Random(crc32(repr((difficulty, width, height, num_mines, first_never_mine)).encode()))
+    batch = BatchMinesweeper(GAMES, difficulty, width, height, num_mines, first_never_mine, seed=1)
+    games = []
+    for _ in range(GAMES):
+        game = Minesweeper(seed=0, clock=VirtualClock())
+        game.set_config(difficulty, width, height, num_mines, first_never_mine)
+        games.append(game)
+    for _ in range(STEPS):
+        r = rng.random()
+        if r < 0.2:
+            # Mostly flag mines, so games can still be won.
+            moves = random_moves(batch, rng, lambda k: batch.mines[k] & (batch.state[k] == 9))
+            assert list(batch.flag(moves)) == [game.flag(x, y) for game, (x, y) in zip(games, moves)]
+        elif r < 0.25:
+            moves = random_moves(batch, rng, lambda k: batch.state[k] >= 9)
+            assert list(batch.question(moves)) == [game.question(x, y) for game, (x, y) in zip(games, moves)]
+        else:
+            # Mostly select safe squares, and sometimes an opened number, to chord.
+            moves = random_moves(batch, rng, lambda k: ~batch.mines[k] if rng.random() < 0.97 else batch.mines[k])
+            unplaced = ~batch.placed.copy()
+            done, opened = batch.select(moves)
+            for k, (game, (x, y)) in enumerate(zip(games, moves)):
+                # The single game gets the layout that the batch drew for it.
+                if unplaced[k]:
+                    game.set_mines(batch.mines[k].astype(np.uint8).tobytes())
+                result = game.select(x, y)
+                assert result.done == done[k]
+                expected = np.zeros((batch.height, batch.width), bool)
+                for square in result.opened:
+                    expected[square.y, square.x] = True
+                assert (expected == opened[k]).all()
+        assert_same(batch, games)
+        if batch.done.all():
+            break
+    assert list(batch.is_won()) == [game.done and game.is_won() for game in games]
+
+
+@pytest.mark.parametrize('move', [(-1, 0), (0, -1), (8, 0), (0, 8)])
+def test_off_board(move):
+    batch = BatchMinesweeper(3, 'beginner', seed=1)
+    moves = np.array([[1, 1], move, [2, 2]])
+    for method in (batch.select, batch.flag, batch.question):
+        with pytest.raises(IndexError):
+            method(moves)
+    assert not batch.placed.any()
+    assert (batch.state == 9).all()
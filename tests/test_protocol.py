@@ -0,0 +1,99 @@
+""" Tests for the binary wire protocol: `encode_move`/`decode_moves` and `encode_result`/`decode_result`. """
+from struct import error as StructError
+
+import pytest
+
+from minesweeper.clock import VirtualClock
+from minesweeper.minesweeper import (MOVE, Minesweeper, Move, OpenedSquare, Result, _read_varint, _write_varint,
+                                     decode_moves, decode_result, encode_move, encode_result)
+
+
+def round_trip(result, width):
+    """ :returns: The result after encoding and decoding it. """
+    return decode_result(encode_result(result, width), width)
+
+
+def sorted_squares(opened, width):
+    """ :returns: The squares in the order `decode_result` returns them, by flat index. """
+    return sorted(opened, key=lambda square: square.y*width + square.x)
+
+
+def test_empty_result():
+    for done in (False, True):
+        encoded = encode_result(Result(done, []), 8)
+        assert encoded == bytes((done, 0))
+        assert decode_result(encoded, 8) == Result(done, [])
+
+
+def test_every_value():
+    values = [0, 1, 2, 3, 4, 5, 6, 7, 8, None, '?', 'flag', 'mine', 'mine_hit', 'flag_wrong']
+    opened = [OpenedSquare(x, 0, value) for x, value in enumerate(values)]
+    assert round_trip(Result(False, opened), len(values)) == Result(False, opened)
+
+
+def test_loss_result():
+    width = 10
+    opened = [OpenedSquare(3, 2, 'mine_hit'), OpenedSquare(0, 0, 'mine'), OpenedSquare(9, 9, 'mine'),
+              OpenedSquare(4, 2, 'flag_wrong'), OpenedSquare(5, 7, 'flag_wrong'), OpenedSquare(1, 0, 'mine')]
+    decoded = round_trip(Result(True, opened), width)
+    assert decoded.done is True
+    assert decoded.opened == sorted_squares(opened, width)
+
+
+def test_long_runs_and_gaps():
+    """ Gaps and run lengths above 127 need multi-byte varints. """
+    width = 1000
+    opened = [OpenedSquare(i % width, i // width, i % 9) for i in range(5, 5 + 300)]
+    opened += [OpenedSquare(i % width, i // width, 'flag') for i in range(20000, 20000 + 128)]
+    opened += [OpenedSquare(999, 999, 3)]
+    decoded = round_trip(Result(False, opened), width)
+    assert decoded.opened == opened
+
+
+def test_odd_run_lengths():
+    """ Runs of an odd length leave half a byte of codes unused. """
+    width = 7
+    opened = [OpenedSquare(0, 0, 1), OpenedSquare(2, 0, 2), OpenedSquare(3, 0, 3), OpenedSquare(4, 0, 4),
+              OpenedSquare(6, 6, 8)]
+    assert round_trip(Result(False, opened), width).opened == opened
+
+
+def test_game_results():
+    game = Minesweeper(seed=1, clock=VirtualClock())
+    game.set_config('custom', 200, 100, 400)
+    for x, y in ((100, 50), (0, 0), (199, 99)):
+        game.reset()
+        result = game.select(x, y)
+        assert round_trip(result, game.width) == Result(result.done, sorted_squares(result.opened, game.width))
+
+
+def test_duplicate_square():
+    opened = [OpenedSquare(1, 1, 2), OpenedSquare(1, 1, 2)]
+    with pytest.raises(ValueError):
+        encode_result(Result(False, opened), 5)
+
+
+@pytest.mark.parametrize('n', [0, 1, 127, 128, 255, 16383, 16384, 2**35 + 17])
+def test_varint(n):
+    data = bytearray(b'\xff')
+    _write_varint(data, n)
+    assert len(data) - 1 == max(1, (n.bit_length() + 6) // 7)
+    assert _read_varint(data, 1) == (n, len(data))
+
+
+def test_moves():
+    moves = [('select', 0, 0), ('flag', 65535, 3), ('question', 17, 65535), ('select', 12, 34)]
+    encoded = b''.join(encode_move(*move) for move in moves)
+    assert len(encoded) == len(moves) * MOVE.size
+    decoded = decode_moves(encoded)
+    assert decoded == moves
+    assert all(isinstance(move, Move) for move in decoded)
+    assert decode_moves(b'') == []
+
+
+def test_invalid_moves():
+    with pytest.raises(ValueError):
+        encode_move('dig', 0, 0)
+    # Coordinates are stored in 16 bits.
+    with pytest.raises(StructError):
+        encode_move('select', 65536, 0)
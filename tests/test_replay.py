@@ -0,0 +1,40 @@
+""" Tests that replay files with forged headers are rejected before anything is allocated for them. """
+from io import BytesIO
+
+import pytest
+
+from minesweeper.replay import (REPLAY, Replay, _REPLAY_MAGIC, _REPLAY_MINES, _REPLAY_VERSION, check, encode_replay,
+                                iter_replays)
+from minesweeper.verification import verify_replays
+
+
+def header(width, height, num_moves, flags=_REPLAY_MINES):
+    """ :returns: A replay header without the data that it announces. """
+    return REPLAY.pack(_REPLAY_MAGIC, _REPLAY_VERSION, flags, width, height, 1, 0, 0, num_moves)
+
+
+@pytest.mark.parametrize('data', [
+    header(4000000000, 4000000000, 0),
+    header(8, 8, 4000000000),
+    # Within the limits, but larger than the rest of the file.
+    header(1000, 1000, 0),
+    header(8, 8, 100000),
+])
+def test_forged_header(tmp_path, data):
+    path = tmp_path / 'forged.replay'
+    path.write_bytes(data)
+    with pytest.raises(ValueError):
+        list(iter_replays(str(path)))
+    report = verify_replays([str(tmp_path)], workers=1)
+    assert report.replays == 0 and report.counts == {'corrupt': 1}
+
+
+def test_limits():
+    replay = Replay(40, 30, 10, True, None, bytes(1200), [('select', 3, 4, 0)], False, False, 0)
+    data = encode_replay(replay)
+    assert list(iter_replays(BytesIO(data))) == [replay]
+    with pytest.raises(ValueError):
+        list(iter_replays(BytesIO(data), max_squares=1000))
+    with pytest.raises(ValueError):
+        list(iter_replays(BytesIO(data), max_moves=0))
+    assert check(replay, max_squares=1000) == 'layout'
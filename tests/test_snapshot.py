@@ -0,0 +1,56 @@
+""" Tests that `Minesweeper.load` restores saved games, and rejects snapshots whose planes don't add up. """
+from io import BytesIO
+
+import pytest
+
+from minesweeper.clock import VirtualClock
+from minesweeper.minesweeper import SNAPSHOT, Minesweeper
+
+
+def snapshot(width=7, height=5, num_mines=6):
+    """ :returns: A game in progress on an odd sized board and its snapshot, as a `bytearray`. """
+    game = Minesweeper(seed=3, clock=VirtualClock())
+    game.set_config('custom', width, height, num_mines)
+    game.select(0, 0)
+    game.flag(6, 4)
+    data = BytesIO()
+    game.save(data)
+    return game, bytearray(data.getvalue())
+
+
+def test_round_trip(tmp_path):
+    game, data = snapshot()
+    path = tmp_path / 'game.snapshot'
+    path.write_bytes(data)
+    loaded = Minesweeper(clock=VirtualClock())
+    loaded.load(str(path))
+    assert loaded.state == game.state and loaded.mines.codes == game.mines.codes
+    assert loaded.opened_count == game.opened_count and loaded.mines_left == game.mines_left
+
+
+def corrupt(data, field, value):
+    """ :returns: The snapshot with a field of its header replaced. """
+    fields = list(SNAPSHOT.unpack_from(data))
+    fields[field] = value
+    return SNAPSHOT.pack(*fields) + data[SNAPSHOT.size:]
+
+
+@pytest.mark.parametrize('change', [
+    # A state code above FLAG_WRONG.
+    lambda data: data[:SNAPSHOT.size] + bytes([data[SNAPSHOT.size] | 0xf]) + data[SNAPSHOT.size + 1:],
+    # A mine more than the header says.
+    lambda data: data[:SNAPSHOT.size + 18] + bytes([data[SNAPSHOT.size + 18] ^ 0x80]) + data[SNAPSHOT.size + 19:],
+    # A number above 8.
+    lambda data: data[:-1] + bytes([data[-1] | 0x9]),
+    lambda data: corrupt(data, 2, 7),
+    lambda data: corrupt(data, 6, 8),
+    lambda data: corrupt(data, 9, SNAPSHOT.unpack_from(data)[9] + 1),
+    lambda data: data[:-1],
+])
+def test_invalid(change):
+    game, data = snapshot()
+    loaded = Minesweeper(clock=VirtualClock())
+    with pytest.raises(ValueError):
+        loaded.load(bytes(change(data)))
+    # A rejected snapshot leaves the game as it was.
+    assert loaded.difficulty == 'intermediate' and loaded.opened_count == 0